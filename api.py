@@ -0,0 +1,203 @@
+"""
+A JSON API for the buy vs rent model, without any Dash component.
+
+    POST /api/v1/buy-vs-rent
+
+The body is one scenario, or {"scenarios": [...]} to evaluate many at once. A scenario has the same inputs as the
+settings panel, i.e., the fields of `Scenario`, with rates in percentages, e.g.,
+
+    {"initial_rent": 1500, "inflation_rate": 2, "property_tax": 650, "condo_fee": 100, "insurance": 50,
+     "utility_cost": 100, "property_appreciation": 3, "mortgage_loan": 400000, "mortgage_interest_rate": 3,
+     "mortgage_terms": 25, "mortgage_payments_per_year": 12, "mortgage_down_payment": 100000, "welcome_tax": 8000,
+     "legal_fee": 1500, "other_investment_roi": 3}
+
+Scenarios sharing the same mortgage terms and payments per year are evaluated together by `batch.evaluate`.
+
+    GET /api/v1/amortization-schedule?loan=400000&interest_rate=3&terms=25&payments_per_year=12&start=2025-01-01
+
+streams the date, payment, interest, principal and balance of every payment of a mortgage, as CSV, or with
+`format=columnar` in the columnar format of `export`. The first payment is on `start`, by default the first day of
+next month.
+"""
+import datetime
+import math
+from collections import defaultdict
+from typing import List
+
+import flask
+import numpy as np
+
+import config
+import export
+from batch import NEVER, evaluate
+from scenario import Scenario
+from tipping_point import find_scenario_tipping_point
+
+blueprint = flask.Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+class Verdict:
+    buy = 'buy'
+    rent = 'rent'
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@blueprint.errorhandler(ApiError)
+def handle_api_error(error: ApiError):
+    return flask.jsonify(error=error.message), error.status
+
+
+# The fields which must be integers, e.g., the years of `range` in the tipping point, with their maximum
+integer_fields = {'mortgage_terms': 100, 'mortgage_payments_per_year': 365}
+# The rates, in percentages, are above -100, e.g., the period rate of the mortgage divides by 1 + rate, and the other
+# fields are amounts of at least 0
+rate_fields = ['inflation_rate', 'property_appreciation', 'mortgage_interest_rate', 'other_investment_roi']
+max_rate = 100
+max_amount = 1e12
+
+
+def check_range(field: str, value):
+    if field in integer_fields:
+        if not isinstance(value, int) or not 1 <= value <= integer_fields[field]:
+            raise ApiError(f"{field} must be an integer between 1 and {integer_fields[field]}")
+    elif field in rate_fields:
+        if not -100 < value <= max_rate:
+            raise ApiError(f"{field} must be above -100 and at most {max_rate}")
+    elif not 0 <= value <= max_amount:
+        raise ApiError(f"{field} must be between 0 and {max_amount:g}")
+
+
+def parse_scenario(json_data) -> Scenario:
+    if not isinstance(json_data, dict):
+        raise ApiError("A scenario must be a JSON object")
+    missing = [field for field in Scenario.fields if field not in json_data]
+    if missing:
+        raise ApiError(f"Missing scenario fields: {', '.join(missing)}")
+    invalid = [field for field in Scenario.fields
+               if isinstance(json_data[field], bool) or not isinstance(json_data[field], (int, float))]
+    if invalid:
+        raise ApiError(f"Scenario fields must be numbers: {', '.join(invalid)}")
+    # NaN and Infinity are accepted by the JSON parser of Python, but would make the response invalid JSON
+    infinite = [field for field in Scenario.fields if not -math.inf < json_data[field] < math.inf]
+    if infinite:
+        raise ApiError(f"Scenario fields must be finite: {', '.join(infinite)}")
+    for field in Scenario.fields:
+        check_range(field, json_data[field])
+    return Scenario.from_inputs(**{field: json_data[field] for field in Scenario.fields})
+
+
+def evaluate_scenarios(scenarios: List[Scenario]) -> List[dict]:
+    groups = defaultdict(list)
+    for index, scenario in enumerate(scenarios):
+        groups[(scenario.mortgage_terms, scenario.mortgage_payments_per_year)].append(index)
+
+    results = [None] * len(scenarios)
+    for (number_of_years, annual_payment_count), indices in groups.items():
+        group = [scenarios[index] for index in indices]
+
+        def column(attribute: str):
+            return np.array([getattr(scenario, attribute) for scenario in group], dtype=float)
+
+        result = evaluate(
+            number_of_years=number_of_years,
+            annual_payment_count=annual_payment_count,
+            mortgage_loan=column('mortgage_loan'),
+            mortgage_interest_rate=column('mortgage_interest_rate'),
+            initial_rent=column('initial_rent'),
+            inflation_rate=column('inflation_rate'),
+            monthly_property_owning_cost=column('monthly_property_owning_cost'),
+            property_appreciation=column('property_appreciation'),
+            other_investment_roi=column('other_investment_roi'),
+            initial_capital=column('initial_capital'),
+            property_initial_value=column('property_initial_value'),
+        )
+        renting_capitals = result.renting_capitals.tolist()
+        property_equities = result.property_equities.tolist()
+        tipping_years = result.tipping_years.tolist()
+
+        for row, (index, scenario) in enumerate(zip(indices, group)):
+            results[index] = {
+                'key': scenario.key,
+                'renting_capitals': renting_capitals[row],
+                'property_equities': property_equities[row],
+                'tipping_year': None if tipping_years[row] == NEVER else tipping_years[row],
+                'tipping_point': find_scenario_tipping_point(scenario),
+                'verdict': Verdict.buy if renting_capitals[row][-1] < property_equities[row][-1] else Verdict.rent,
+            }
+    return results
+
+
+@blueprint.route('/buy-vs-rent', methods=['POST'])
+def buy_vs_rent():
+    json_data = flask.request.get_json(silent=True)
+    if json_data is None:
+        raise ApiError("The body must be JSON")
+
+    if isinstance(json_data, dict) and 'scenarios' in json_data:
+        if not isinstance(json_data['scenarios'], list):
+            raise ApiError("scenarios must be a list")
+        if len(json_data['scenarios']) > config.api_max_scenarios:
+            raise ApiError(f"At most {config.api_max_scenarios} scenarios per request", status=413)
+        scenarios = [parse_scenario(scenario) for scenario in json_data['scenarios']]
+        return flask.jsonify(results=evaluate_scenarios(scenarios))
+
+    return flask.jsonify(evaluate_scenarios([parse_scenario(json_data)])[0])
+
+
+class ExportFormat:
+    csv = 'csv'
+    columnar = 'columnar'
+
+
+def parse_number(name: str, minimum: float, maximum: float, integer: bool = False):
+    text = flask.request.args.get(name)
+    if text is None:
+        raise ApiError(f"Missing parameter: {name}")
+    try:
+        value = int(text) if integer else float(text)
+    except ValueError:
+        raise ApiError(f"{name} must be {'an integer' if integer else 'a number'}")
+    if not minimum <= value <= maximum:
+        raise ApiError(f"{name} must be between {minimum} and {maximum}")
+    return value
+
+
+def parse_start() -> datetime.date:
+    text = flask.request.args.get('start')
+    if text is None:
+        return export.add_months(datetime.date.today().replace(day=1), 1)
+    try:
+        return datetime.datetime.strptime(text, '%Y-%m-%d').date()
+    except ValueError:
+        raise ApiError("start must be a date, e.g., 2025-01-01")
+
+
+@blueprint.route('/amortization-schedule')
+def amortization_schedule():
+    loan = parse_number('loan', minimum=0, maximum=1e12)
+    interest_rate = parse_number('interest_rate', minimum=0, maximum=100)
+    terms = parse_number('terms', minimum=1, maximum=100, integer=True)
+    payments_per_year = parse_number('payments_per_year', minimum=1, maximum=365, integer=True)
+    start = parse_start()
+    export_format = flask.request.args.get('format', ExportFormat.csv)
+
+    chunks = export.schedule_chunks(loan, interest_rate / 100, terms, payments_per_year, start)
+    file_name = f"amortization-schedule-{start.isoformat()}"
+    if export_format == ExportFormat.csv:
+        body, mimetype, file_name = export.csv_chunks(chunks), 'text/csv', f"{file_name}.csv"
+    elif export_format == ExportFormat.columnar:
+        parameters = dict(loan=loan, interest_rate=interest_rate, terms=terms, payments_per_year=payments_per_year,
+                          start=start.isoformat())
+        body, mimetype, file_name = export.columnar_chunks(chunks, parameters), 'application/octet-stream', \
+            f"{file_name}.vsch"
+    else:
+        raise ApiError(f"format must be {ExportFormat.csv} or {ExportFormat.columnar}")
+
+    return flask.Response(body, mimetype=mimetype,
+                          headers={'Content-Disposition': f'attachment; filename="{file_name}"'})
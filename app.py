@@ -1,52 +1,76 @@
-import json
+# First, to time the import of everything else
+import startup  # noqa: I100
+
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import dash
 import dash_html_components as html
+import numpy as np
 from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 
+import api
+import appstate
+import config
+import formats
 import id
+import logs
+import metrics
+import mortgage
+import static
+import tax
 import views
-from appstate import AppState
-from investments import RentingCapital, PropertyValue
-from mortgage import Mortgage
-from rent import Rent
-from variable_settings import create_settings_panel
-
-external_scripts = [
-]
-
-external_stylesheets = [
-    # Bootstrap
-    "https://maxcdn.bootstrapcdn.com/bootstrap/4.0.0/css/bootstrap.min.css",
-    # Loading state https://community.plot.ly/t/mega-dash-loading-states/5687/3
-    'https://codepen.io/chriddyp/pen/bWLwgP.css', 'https://codepen.io/chriddyp/pen/brPBPO.css'
-]
+from appstate import AppState, LazyAppState
+from batch import evaluate_grid
+from cache import MemoryCache, ScenarioCache
+from components import ScenarioGraph
+from config import StateEncoding, StateStorage
+from scenario import Scenario
+from tipping_point import find_scenario_tipping_point
+from variable_settings import amortization_period_options, create_settings_panel, payment_frequency_options
 
 app = dash.Dash(
     __name__,
-    external_scripts=external_scripts,
-    external_stylesheets=external_stylesheets
+    external_stylesheets=static.stylesheets(),
+    assets_ignore=static.assets_ignore,
+    # Compressed by `static.setup`, with brotli and above a size threshold
+    compress=False
 )
 app.title = 'Buy vs Rent'
-
-logFormatter = logging.Formatter("%(asctime)s [%(threadName)-12.12s] [%(levelname)-5.5s]  %(message)s")
-
-fileHandler = logging.FileHandler("Vancouver.log")
-fileHandler.setFormatter(logFormatter)
-fileHandler.setLevel(logging.INFO)
-
-consoleHandler = logging.StreamHandler()
-consoleHandler.setFormatter(logFormatter)
-consoleHandler.setLevel(logging.INFO)
-
-app.server.logger.handlers = []
-
-app.server.logger.addHandler(consoleHandler)
-app.server.logger.addHandler(fileHandler)
+app.server.register_blueprint(api.blueprint)
+app.server.register_blueprint(metrics.blueprint)
+app.server.register_blueprint(startup.blueprint)
+static.setup(app.server)
 
 logger = app.server.logger
 logger.setLevel(logging.DEBUG)
+log_pipeline = logs.setup(logger)
+
+scenario_cache = ScenarioCache(
+    path=config.scenario_cache_path,
+    max_entries=config.scenario_cache_max_entries,
+    ttl_seconds=config.scenario_cache_ttl_seconds,
+    # The cached states are dumped by `dump_state`, which depends on these
+    version=f'{appstate.state_version}-{config.state_encoding}-{int(config.state_round_to_cents)}'
+) if config.scenario_cache_path else MemoryCache(max_entries=config.scenario_cache_max_entries)
+
+tax_schedule = tax.get_schedule(config.tax_jurisdiction)
+
+metrics.registry.describe('vancouver_scenario_components_total',
+                          "Lookups of the models of a scenario, by whether they were reused from a previous scenario.")
+scenario_graph = ScenarioGraph(
+    max_entries=config.component_cache_max_entries,
+    listener=lambda component, hit: metrics.registry.increment(
+        'vancouver_scenario_components_total', component=component, result='hit' if hit else 'miss')
+)
+
+metrics.registry.describe('vancouver_update_output_skipped_total',
+                          "Calls of update_output skipped because the scenario was unchanged.")
+metrics.registry.describe('vancouver_scenario_computations_total',
+                          "Scenarios computed by update_output, i.e., missing from the scenario cache.")
 
 app.layout = html.Div(className='container', children=[
     html.H1(className="display-4", children='Buy vs Rent'),
@@ -58,6 +82,7 @@ app.layout = html.Div(className='container', children=[
     html.Br(),
     views.create_insights_tabs(),
     html.Div(id=id.memory_state, style={'display': 'none'}),  # Invisible cache
+    html.Div(id=id.memory_key, style={'display': 'none'}),  # The key of the scenario of memory_state
     html.Br(),
     html.Br(),
 ])
@@ -71,9 +96,9 @@ app.layout = html.Div(className='container', children=[
     ]
 )
 def calculate_loan(property_sale_price: float, property_down_payment: float):
-    logger.log(
-        logging.INFO,
-        msg=f"Calculate loan property_sale_price={property_sale_price}, property_down_payment={property_down_payment}"
+    logger.info(
+        "Calculate loan property_sale_price=%s, property_down_payment=%s", property_sale_price, property_down_payment,
+        extra={'callback': 'calculate_loan'}
     )
     return property_sale_price - property_down_payment
 
@@ -85,39 +110,35 @@ def calculate_loan(property_sale_price: float, property_down_payment: float):
     ]
 )
 def calculate_welcome_tax(property_sale_price):
-    logger.log(logging.INFO, msg=f"Calculate welcome tax\n\tproperty_sale_price={property_sale_price}")
-
-    class Ladder(object):
-        def __init__(self,
-                     price_from_k: float,
-                     price_to_k: float,
-                     percentage: float):
-            self.from_price = price_from_k * 1000
-            self.to_price = price_to_k * 1000
-            self.percentage = percentage / 100
-
-    ladders = [
-        Ladder(0, 50, 0.5),
-        Ladder(50, 250, 1.0),
-        Ladder(250, 500, 1.5),
-        Ladder(500, 1000, 2.0),
-        Ladder(1000, float("inf"), 2.5),
-    ]
-
-    result = 0
-    for ladder in ladders:
-        if property_sale_price < ladder.from_price:
-            result += 0
-        elif property_sale_price > ladder.to_price:
-            result += (ladder.to_price - ladder.from_price) * ladder.percentage
-        else:
-            result += (property_sale_price - ladder.from_price) * ladder.percentage
-
-    return result
+    logger.info(
+        "Calculate welcome tax\n\tproperty_sale_price=%s", property_sale_price,
+        extra={'callback': 'calculate_welcome_tax'}
+    )
+    return tax_schedule.tax(property_sale_price, exemptions=config.tax_exemptions)
+
+
+update_output_message = (
+    "Update output: "
+    "\n\tinitial_rent=%s"
+    "\n\tinflation_rate=%s"
+    "\n\tproperty_tax=%s"
+    "\n\tcondo_fee=%s"
+    "\n\tinsurance=%s"
+    "\n\tutility_cost=%s"
+    "\n\tproperty_appreciation=%s"
+    "\n\tmortgage_loan=%s"
+    "\n\tmortgage_interest_rate=%s"
+    "\n\tmortgage_terms=%s"
+    "\n\tmortgage_payments_per_year=%s"
+    "\n\tmortgage_down_payment=%s"
+    "\n\twelcome_tax=%s"
+    "\n\tlegal_fee=%s"
+    "\n\tother_investment_roi=%s"
+)
 
 
 @app.callback(
-    Output(id.memory_state, 'children'),
+    Output(id.memory_key, 'children'),
     [
         # Rent
         Input(id.input_initial_rent, 'n_submit'), Input(id.input_initial_rent, 'n_blur'),
@@ -160,6 +181,8 @@ def calculate_welcome_tax(property_sale_price):
         State(id.input_legal_fee, 'value'),
         # Other investments
         State(id.other_investment_roi, 'value'),
+        # The key of the current scenario, to skip the update when it is unchanged, without sending the state
+        State(id.memory_key, 'children'),
     ])
 def update_output(
         # Rent
@@ -192,107 +215,167 @@ def update_output(
         welcome_tax,
         legal_fee,
         other_investment_roi,
+        memory_key,
 ):
-    logger.log(
-        logging.INFO,
-        msg="Update output: " +
-            f"\n\tinitial_rent={initial_rent}" +
-            f"\n\tinflation_rate={inflation_rate}" +
-            f"\n\tproperty_tax={property_tax}" +
-            f"\n\tcondo_fee={condo_fee}" +
-            f"\n\tinsurance={insurance}" +
-            f"\n\tutility_cost={utility_cost}" +
-            f"\n\tproperty_appreciation={property_appreciation}" +
-            f"\n\tmortgage_loan={mortgage_loan}" +
-            f"\n\tmortgage_interest_rate={mortgage_interest_rate}" +
-            f"\n\tmortgage_terms={mortgage_terms}" +
-            f"\n\tmortgage_payments_per_year={mortgage_payments_per_year}" +
-            f"\n\tmortgage_down_payment={mortgage_down_payment}" +
-            f"\n\twelcome_tax={welcome_tax}" +
-            f"\n\tlegal_fee={legal_fee}" +
-            f"\n\tother_investment_roi={other_investment_roi}"
+    logger.info(
+        update_output_message,
+        initial_rent, inflation_rate, property_tax, condo_fee, insurance, utility_cost, property_appreciation,
+        mortgage_loan, mortgage_interest_rate, mortgage_terms, mortgage_payments_per_year, mortgage_down_payment,
+        welcome_tax, legal_fee, other_investment_roi,
+        extra={'callback': 'update_output'}
     )
 
-    inflation_rate = inflation_rate / 100
-    mortgage_interest_rate = mortgage_interest_rate / 100
-    property_appreciation = property_appreciation / 100
-    other_investment_roi = other_investment_roi / 100
+    scenario = Scenario.from_inputs(
+        initial_rent=initial_rent,
+        inflation_rate=inflation_rate,
+        property_tax=property_tax,
+        condo_fee=condo_fee,
+        insurance=insurance,
+        utility_cost=utility_cost,
+        property_appreciation=property_appreciation,
+        mortgage_loan=mortgage_loan,
+        mortgage_interest_rate=mortgage_interest_rate,
+        mortgage_terms=mortgage_terms,
+        mortgage_payments_per_year=mortgage_payments_per_year,
+        mortgage_down_payment=mortgage_down_payment,
+        welcome_tax=welcome_tax,
+        legal_fee=legal_fee,
+        other_investment_roi=other_investment_roi,
+    )
 
-    number_of_years = mortgage_terms
+    # Pressing Enter and then leaving an input triggers both n_submit and n_blur with the same values
+    if scenario.key == memory_key:
+        logger.debug("Skip update output, the scenario is unchanged \n\tkey=%s", scenario.key)
+        metrics.registry.increment('vancouver_update_output_skipped_total')
+        raise PreventUpdate()
+
+    state_json = scenario_cache.get(scenario.key)
+    if state_json is None:
+        metrics.registry.increment('vancouver_scenario_computations_total')
+        state_json = dump_state(AppState.create(scenario, graph=scenario_graph))
+        scenario_cache.put(scenario.key, state_json)
+    return scenario.key
+
+
+def dump_state(state: AppState) -> str:
+    if config.state_encoding == StateEncoding.compact:
+        return state.dump_compact(round_to_cents=config.state_round_to_cents)
+    return state.dump()
+
+
+# The inputs of a Scenario, in the order of `Scenario.fields`
+scenario_states = [
+    # Rent
+    State(id.input_initial_rent, 'value'),
+    State(id.input_inflation_rate, 'value'),
+    # Property
+    State(id.input_property_tax, 'value'),
+    State(id.input_condo_fee, 'value'),
+    State(id.input_insurance, 'value'),
+    State(id.input_utility_cost, 'value'),
+    State(id.input_property_appreciation, 'value'),
+    # Mortgage
+    State(id.input_mortgage_load, 'value'),
+    State(id.input_mortgage_interest_rate, 'value'),
+    State(id.input_mortgage_terms, 'value'),
+    State(id.input_mortgage_payments_per_year, 'value'),
+    # Purchase Upfront Cost
+    State(id.input_mortgage_down_payment, 'value'),
+    State(id.input_welcome_tax, 'value'),
+    State(id.input_legal_fee, 'value'),
+    # Other investments
+    State(id.other_investment_roi, 'value'),
+]
 
-    monthly_property_owning_cost = property_tax + condo_fee + insurance + utility_cost
 
-    mortgage = Mortgage.create(
-        loan=mortgage_loan,
-        annual_interest_rate=mortgage_interest_rate,
-        amortization_period=number_of_years,
-        annual_payment_count=mortgage_payments_per_year
-    )
+# The summary and the tab content are rendered from the same state, so the state decoded for the one is kept for the
+# other, keyed by the content of the memory_state div
+decoded_states = MemoryCache(max_entries=16)
 
-    rent = Rent.create_rent(initial_monthly_rent=initial_rent, inflation_rate=inflation_rate,
-                            number_of_years=number_of_years)
-
-    initial_capital = mortgage_down_payment + welcome_tax + legal_fee
-    renting_capital = RentingCapital.create(
-        initial_capital=initial_capital,
-        return_on_investment=other_investment_roi,
-        monthly_property_owning_cost=monthly_property_owning_cost,
-        mortgage=mortgage,
-        rent=rent,
-        number_of_years=number_of_years
-    )
 
-    property_initial_value = mortgage_down_payment + mortgage_loan
-    property_value = PropertyValue.create(
-        initial_value=property_initial_value,
-        appreciation_rate=property_appreciation,
-        mortgage=mortgage,
-        number_of_years=number_of_years,
-        real_estate_commission=0.05
-    )
+def cached_state_json(key: str, scenario_inputs) -> str:
+    """
+    :param scenario_inputs: the values of `scenario_states`, to recompute the state if it is no longer cached
+    :return: the dumped state of the scenario of `key`
+    :raise PreventUpdate: if the state is no longer cached and the inputs are of another scenario
+    """
+    state_json = scenario_cache.get(key)
+    if state_json is None:
+        scenario = Scenario.from_inputs(**dict(zip(Scenario.fields, scenario_inputs)))
+        if scenario.key != key:
+            # The inputs changed since, and update_output will store the state of the new scenario
+            logger.info("State cache miss, the inputs changed \n\tkey=%s", key)
+            raise PreventUpdate()
+        logger.info("State cache miss, recompute \n\tkey=%s", key)
+        state_json = dump_state(AppState.create(scenario, graph=scenario_graph))
+        scenario_cache.put(scenario.key, state_json)
+    return state_json
 
-    cache = AppState(
-        number_of_years=number_of_years,
-        rent=rent,
-        property_value=property_value,
-        renting_capital=renting_capital,
-        mortgage=mortgage
-    )
 
-    return cache.dump()
+@app.callback(
+    Output(id.memory_state, 'children'),
+    [
+        Input(id.memory_key, 'children')
+    ],
+    scenario_states
+)
+def store_state(key, *scenario_inputs):
+    """
+    Store the state of the scenario computed by update_output in the browser, or only its key if the server keeps it.
+    """
+    if not key:
+        raise PreventUpdate()
+    if config.state_storage == StateStorage.server:
+        return key
+    return cached_state_json(key, scenario_inputs)
+
+
+def load_state(state_payload: str, scenario_inputs) -> LazyAppState:
+    """
+    :param state_payload: the content of the memory_state div
+    :param scenario_inputs: the values of `scenario_states`, to recompute the state if it is no longer cached
+    :raise PreventUpdate: if the state is no longer cached and the inputs are of another scenario
+    """
+    state = decoded_states.get(state_payload)
+    if state is not None:
+        return state
+
+    if config.state_storage == StateStorage.server:
+        state_json = cached_state_json(state_payload, scenario_inputs)
+    else:
+        state_json = str(state_payload)
+
+    state = LazyAppState(state_json)
+    decoded_states.put(state_payload, state)
+    return state
+
+
+def create_sensitivity_grid(scenario: Scenario):
+    return evaluate_grid(
+        scenario,
+        interest_rates=np.arange(1, 10.5, 0.5) / 100,
+        appreciation_rates=np.arange(-2, 8.5, 0.5) / 100,
+    )
 
 
 @app.callback(
     Output(id.graph_rent_or_buy, 'children'),
     [
         Input(id.memory_state, 'children')
-    ]
+    ],
+    scenario_states
 )
-def render_content(state_json):
-    state = AppState.from_json(json.loads(state_json))
+def render_content(state_payload, *scenario_inputs):
+    state = load_state(state_payload, scenario_inputs)
     return views.create_summary_graph(
         x_axis_years=state.x_axis_years,
         renting_capital=state.renting_capital,
-        property_value=state.property_value
+        property_value=state.property_value,
+        tipping_point=find_scenario_tipping_point(state.scenario) if state.scenario else None
     )
 
 
-@app.callback(
-    Output(id.detailed_insights_tab_content, 'children'),
-    [
-        Input(id.detailed_insights_tab, 'value'),
-        Input(id.memory_state, 'children'),
-    ]
-)
-def render_content(tab, state_json):
-    state_json = str(state_json)
-    state = AppState.from_json(json.loads(state_json))
-
-    logger.log(
-        logging.INFO,
-        msg=f"Choose tab \n\ttab={tab}"
-    )
-
+def render_tab(tab: str, state: LazyAppState):
     if tab == id.TabValue.tab_value_rent:
         return views.create_rental_graph(state.x_axis_years, state.rent)
     elif tab == id.TabValue.tab_value_mortgage_payment:
@@ -306,9 +389,117 @@ def render_content(tab, state_json):
         )
     elif tab == id.TabValue.tab_value_asset_for_buy:
         return views.create_buying_investment_graph(state.x_axis_years, property_value=state.property_value)
+    elif tab == id.TabValue.tab_value_sensitivity and state.scenario:
+        return views.create_sensitivity_heatmap(create_sensitivity_grid(state.scenario))
     else:
         return None
 
 
+# The rendered tabs, keyed by (the key of the state, the tab)
+rendered_tabs = MemoryCache(max_entries=config.tab_cache_max_entries)
+# Once a state is shown, its other tabs are rendered in the background, so that switching tabs is a cache hit. The
+# threads only start with the first prefetch, i.e., in the worker rather than in the parent process.
+prefetch_executor = ThreadPoolExecutor(
+    max_workers=config.tab_prefetch_threads, thread_name_prefix='prefetch') if config.tab_prefetch_threads else None
+prefetching = set()
+prefetching_lock = threading.Lock()
+
+metrics.registry.describe('vancouver_rendered_tabs_total', "Tabs rendered, by whether they were in the cache.")
+
+
+def prefetch_tab(cache_key, tab: str, state: LazyAppState):
+    try:
+        rendered_tabs.put(cache_key, render_tab(tab, state))
+        metrics.registry.increment('vancouver_rendered_tabs_total', result='prefetch')
+    except Exception:
+        logger.exception("Failed to prefetch the tab %s", tab)
+    finally:
+        with prefetching_lock:
+            prefetching.discard(cache_key)
+
+
+def prefetch_tabs(key: str, state: LazyAppState, shown_tab: str):
+    if prefetch_executor is None:
+        return
+    for tab in id.TabValue.all_tabs:
+        cache_key = (key, tab)
+        if tab == shown_tab or rendered_tabs.get(cache_key) is not None:
+            continue
+        with prefetching_lock:
+            if cache_key in prefetching:
+                continue
+            prefetching.add(cache_key)
+        prefetch_executor.submit(prefetch_tab, cache_key, tab, state)
+
+
+@app.callback(
+    Output(id.detailed_insights_tab_content, 'children'),
+    [
+        Input(id.detailed_insights_tab, 'value'),
+        Input(id.memory_state, 'children'),
+    ],
+    scenario_states
+)
+def render_content(tab, state_payload, *scenario_inputs):
+    logger.info("Choose tab \n\ttab=%s", tab, extra={'callback': 'choose_tab'})
+
+    state = load_state(state_payload, scenario_inputs)
+    key = state.scenario.key if state.scenario else state_payload
+
+    content = rendered_tabs.get((key, tab))
+    if content is not None:
+        metrics.registry.increment('vancouver_rendered_tabs_total', result='hit')
+    else:
+        metrics.registry.increment('vancouver_rendered_tabs_total', result='miss')
+        content = render_tab(tab, state)
+        rendered_tabs.put((key, tab), content)
+
+    prefetch_tabs(key, state, shown_tab=tab)
+    return content
+
+
+metrics.instrument_callbacks(app)
+
+
+def build_annuity_table():
+    if config.annuity_table_max_rate:
+        mortgage.annuity_table.build(
+            amortization_periods=[option['value'] for option in amortization_period_options],
+            annual_payment_counts=[option['value'] for option in payment_frequency_options],
+            max_rate_in_percent=int(config.annuity_table_max_rate)
+        )
+
+
+def default_scenario_inputs() -> list:
+    """
+    :return: the values of `scenario_states` in the layout, i.e., before the user changes anything
+    """
+    values = {component.id: component.value for component in app.layout.traverse()
+              if getattr(component, 'id', None) is not None and hasattr(component, 'value')}
+    return [values[state.component_id] for state in scenario_states]
+
+
+def warm_default_scenario():
+    """
+    Compute the state and render every tab of the scenario of the first page load.
+    """
+    scenario_inputs = default_scenario_inputs()
+    scenario = Scenario.from_inputs(**dict(zip(Scenario.fields, scenario_inputs)))
+    state_json = scenario_cache.get(scenario.key)
+    if state_json is None:
+        state_json = dump_state(AppState.create(scenario, graph=scenario_graph))
+        scenario_cache.put(scenario.key, state_json)
+    state = load_state(scenario.key if config.state_storage == StateStorage.server else state_json, scenario_inputs)
+    for tab in id.TabValue.all_tabs:
+        rendered_tabs.put((scenario.key, tab), render_tab(tab, state))
+
+
+startup.imported()
+startup.warm(OrderedDict([
+    ('annuity_table', build_annuity_table),
+    ('locale', formats.get_money_formatter),
+    ('default_scenario', warm_default_scenario),
+]), logger=logger)
+
 if __name__ == '__main__':
     app.run_server()
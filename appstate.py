@@ -1,16 +1,89 @@
+import components
+from components import ScenarioGraph
 from investments import PropertyValue, RentingCapital
 from mortgage import Mortgage
 from rent import Rent
+from scenario import Scenario
+import base64
 import json
 
+import numpy as np
+
+# The sections of a dumped AppState, each of which is itself a JSON string so that it can be decoded on its own
+sections = {
+    "mortgage": Mortgage,
+    "property_value": PropertyValue,
+    "renting_capital": RentingCapital,
+    "rent": Rent,
+    "scenario": Scenario,
+}
+
+
+# The value of "encoding" in a state dumped by `AppState.dump_compact`
+compact_encoding = "compact"
+
+# Bump when the dumped formats or the models change, so that the states cached by a previous release are not reused
+state_version = 2
+
+# The prefix of a series packed as integer cents, followed by the dtype, e.g., 'cents<i4:'
+cents_prefix = 'cents'
+
+
+def pack_series(values, round_to_cents: bool = False) -> str:
+    """
+    :param round_to_cents: pack the series as integer cents, on 4 bytes rather than 8 if they fit, i.e., below
+        21 million dollars
+    :return: the little-endian doubles, or cents, encoded in base64
+    """
+    values = np.asarray(values, dtype='<f8')
+    if round_to_cents and np.isfinite(values).all():
+        cents = np.rint(values * 100)
+        dtype = '<i4' if not len(cents) or np.abs(cents).max() < 2 ** 31 else '<i8'
+        return f"{cents_prefix}{dtype}:" + base64.b64encode(cents.astype(dtype).tobytes()).decode('ascii')
+    return base64.b64encode(values.tobytes()).decode('ascii')
+
+
+def unpack_series(packed: str):
+    if packed.startswith(cents_prefix):
+        dtype, _, packed = packed[len(cents_prefix):].partition(':')
+        return np.frombuffer(base64.b64decode(packed), dtype=dtype) / 100
+    return np.frombuffer(base64.b64decode(packed), dtype='<f8')
+
+
+def decode_section(json_data: dict, name: str):
+    section = json_data.get(name)
+    if section is None:
+        return None
+
+    cls = sections[name]
+    if json_data.get("encoding") == compact_encoding:
+        kwargs = dict(section["values"])
+        kwargs.update({field: unpack_series(packed) for field, packed in section["series"].items()})
+        kwargs.update({field: None for field in getattr(cls, "detailed_fields", [])})
+        return cls(**kwargs)
+
+    if isinstance(section, str):
+        section = json.loads(section)
+    return cls(**section)
+
 
 class AppState:
-    def __init__(self, number_of_years, mortgage, renting_capital, property_value, rent, *args, **kwargs):
+    def __init__(self, number_of_years, mortgage, renting_capital, property_value, rent, scenario=None,
+                 *args, **kwargs):
         self.property_value = property_value
         self.renting_capital = renting_capital
         self.mortgage = mortgage
         self.number_of_years = number_of_years
         self.rent = rent
+        self.scenario = scenario
+
+    @classmethod
+    def create(cls, scenario: Scenario, graph: ScenarioGraph = None):
+        """
+        :param graph: reuses the models of the previous scenarios whose inputs are unchanged, see `components`
+        """
+        models = graph.compute(scenario) if graph is not None else components.compute(scenario)
+        return cls(number_of_years=scenario.number_of_years, scenario=scenario, **models)
 
     @property
     def x_axis_years(self):
@@ -19,12 +92,85 @@ class AppState:
     @classmethod
     def from_json(cls, json_data: dict):
         return cls(
-            property_value=PropertyValue(**json_data["property_value"]),
-            renting_capital=RentingCapital(**json_data["renting_capital"]),
-            mortgage=Mortgage(**json_data["mortgage"]),
+            property_value=decode_section(json_data, "property_value"),
+            renting_capital=decode_section(json_data, "renting_capital"),
+            mortgage=decode_section(json_data, "mortgage"),
             number_of_years=json_data["number_of_years"],
-            rent=Rent(**json_data["rent"])
+            rent=decode_section(json_data, "rent"),
+            scenario=decode_section(json_data, "scenario")
         )
 
     def dump(self):
-        return json.dumps(self, default=lambda o: o.__dict__, sort_keys=True, indent=4)
+        json_data = {
+            name: json.dumps(getattr(self, name).to_dict(), sort_keys=True)
+            for name in sections if getattr(self, name) is not None
+        }
+        json_data["number_of_years"] = self.number_of_years
+        return json.dumps(json_data, sort_keys=True, indent=4)
+
+    def dump_compact(self, round_to_cents: bool = False):
+        """
+        Dump only what the graphs need: the yearly series, packed as base64 encoded little-endian doubles, but not
+        the per-payment mortgage schedule. `from_json` and `LazyAppState` decode either format.
+        """
+        json_data = {
+            "encoding": compact_encoding,
+            "number_of_years": self.number_of_years,
+        }
+        for name in sections:
+            section = getattr(self, name)
+            if section is None:
+                continue
+            detailed_fields = getattr(section, "detailed_fields", [])
+            json_data[name] = {
+                "values": {field: getattr(section, field) for field in section.scalar_fields},
+                "series": {
+                    field: pack_series(getattr(section, field), round_to_cents=round_to_cents)
+                    for field in section.series_fields if field not in detailed_fields
+                },
+            }
+        return json.dumps(json_data, sort_keys=True, separators=(',', ':'))
+
+
+class LazyAppState(object):
+    """
+    An AppState decoded from `AppState.dump`, which only decodes the sections that are actually used, e.g., a view of
+    the rent does not pay for decoding the per-payment mortgage schedule.
+    """
+
+    def __init__(self, state_json: str):
+        self._json_data = json.loads(state_json)
+        self._decoded = {}
+
+    def _section(self, name: str):
+        if name not in self._decoded:
+            self._decoded[name] = decode_section(self._json_data, name)
+        return self._decoded[name]
+
+    @property
+    def number_of_years(self):
+        return self._json_data["number_of_years"]
+
+    @property
+    def x_axis_years(self):
+        return list(range(1, self.number_of_years + 1))
+
+    @property
+    def mortgage(self) -> Mortgage:
+        return self._section("mortgage")
+
+    @property
+    def property_value(self) -> PropertyValue:
+        return self._section("property_value")
+
+    @property
+    def renting_capital(self) -> RentingCapital:
+        return self._section("renting_capital")
+
+    @property
+    def rent(self) -> Rent:
+        return self._section("rent")
+
+    @property
+    def scenario(self) -> Scenario:
+        return self._section("scenario")
@@ -0,0 +1,164 @@
+"""
+Vectorized buy vs rent evaluation for many parameter sets at once.
+
+The functions here follow the same yearly model as `Mortgage`, `Rent`, `RentingCapital` and `PropertyValue`, but
+every input may be a numpy array, and all the scenarios are evaluated together with numpy broadcasting.
+"""
+import numpy as np
+
+from mortgage import annuity_payment, remaining_balance
+from scenario import Scenario
+
+# The value of `tipping_years` when buying never beats renting
+NEVER = 0
+
+
+class BatchResult(object):
+    def __init__(self, renting_capitals, property_equities):
+        """
+        :param renting_capitals: the equity for rent, shaped (..., number_of_years)
+        :param property_equities: the equity for buy, shaped (..., number_of_years)
+        """
+        self.renting_capitals = renting_capitals
+        self.property_equities = property_equities
+
+    @property
+    def equity_differences(self):
+        """Buy minus rent equity by year."""
+        return self.property_equities - self.renting_capitals
+
+    @property
+    def final_equity_differences(self):
+        """Buy minus rent equity in the final year."""
+        return self.equity_differences[..., -1]
+
+    @property
+    def tipping_years(self):
+        """The first year (1-based) in which the equity for buy is higher than for rent, or `NEVER`."""
+        better_buy = self.property_equities > self.renting_capitals
+        return np.where(better_buy.any(axis=-1), better_buy.argmax(axis=-1) + 1, NEVER)
+
+
+def evaluate(number_of_years: int, annual_payment_count: int, mortgage_loan, mortgage_interest_rate, initial_rent,
+             inflation_rate, monthly_property_owning_cost, property_appreciation, other_investment_roi,
+             initial_capital, property_initial_value, real_estate_commission=0.05) -> BatchResult:
+    """
+    Evaluate any number of scenarios sharing the same amortization period and payment frequency. All the other
+    parameters are scalars or numpy arrays that broadcast against each other. Rates are fractions, e.g., 0.03.
+    """
+    mortgage_loan, mortgage_interest_rate, initial_rent, inflation_rate, monthly_property_owning_cost, \
+        property_appreciation, other_investment_roi, initial_capital, property_initial_value = [
+            np.asarray(value, dtype=float)[..., np.newaxis] for value in np.broadcast_arrays(
+                mortgage_loan, mortgage_interest_rate, initial_rent, inflation_rate, monthly_property_owning_cost,
+                property_appreciation, other_investment_roi, initial_capital, property_initial_value
+            )
+        ]
+    shape = mortgage_loan.shape[:-1] + (number_of_years,)
+    return evaluate_paths(
+        number_of_years=number_of_years,
+        annual_payment_count=annual_payment_count,
+        mortgage_loan=mortgage_loan,
+        mortgage_interest_rate=mortgage_interest_rate,
+        initial_rent=initial_rent,
+        monthly_property_owning_cost=monthly_property_owning_cost,
+        initial_capital=initial_capital,
+        property_initial_value=property_initial_value,
+        inflation_rates=np.broadcast_to(inflation_rate, shape),
+        appreciation_rates=np.broadcast_to(property_appreciation, shape),
+        investment_rois=np.broadcast_to(other_investment_roi, shape),
+        real_estate_commission=real_estate_commission,
+    )
+
+
+def evaluate_paths(number_of_years: int, annual_payment_count: int, mortgage_loan, mortgage_interest_rate,
+                   initial_rent, monthly_property_owning_cost, initial_capital, property_initial_value,
+                   inflation_rates, appreciation_rates, investment_rois, real_estate_commission=0.05) -> BatchResult:
+    """
+    Like `evaluate`, but the inflation, appreciation and ROI rates may change year over year. The scalar parameters
+    are shaped (..., 1) and the yearly rates are shaped (..., number_of_years).
+    """
+    years = np.arange(number_of_years)
+
+    # Mortgage
+    period_rate = mortgage_interest_rate / annual_payment_count
+    payment = annuity_payment(mortgage_loan, period_rate, number_of_years * annual_payment_count)
+    remaining_principles_by_year = remaining_balance(mortgage_loan, period_rate, payment,
+                                                     (years + 1) * annual_payment_count)
+
+    # Rent and the cost of owning grow with inflation, starting from the second year
+    inflation = np.cumprod(1 + inflation_rates, axis=-1)
+    inflation = np.concatenate((np.ones(inflation.shape[:-1] + (1,)), inflation[..., :-1]), axis=-1)
+    rent_yearly_payments = initial_rent * 12 * inflation
+    yearly_property_owning_costs = monthly_property_owning_cost * 12 * inflation
+
+    # Renting: the money not spent on the property is invested
+    investments = payment * annual_payment_count + yearly_property_owning_costs - rent_yearly_payments
+    renting_capitals = np.empty(investments.shape)
+    current_capital = initial_capital[..., 0]
+    for i in range(number_of_years):
+        current_capital = current_capital * (investment_rois[..., i] + 1) + investments[..., i]
+        renting_capitals[..., i] = current_capital
+
+    # Buying: the value of selling the house at year N
+    value_by_year = property_initial_value * np.cumprod(1 + appreciation_rates, axis=-1)
+    property_equities = value_by_year * (1 - real_estate_commission) - remaining_principles_by_year
+
+    return BatchResult(renting_capitals=renting_capitals, property_equities=property_equities)
+
+
+def evaluate_scenario(scenario: Scenario, **overrides) -> BatchResult:
+    """
+    Evaluate `scenario` with some of its parameters replaced by arrays, e.g., `mortgage_interest_rate`.
+    """
+    parameters = dict(
+        mortgage_loan=scenario.mortgage_loan,
+        mortgage_interest_rate=scenario.mortgage_interest_rate,
+        initial_rent=scenario.initial_rent,
+        inflation_rate=scenario.inflation_rate,
+        monthly_property_owning_cost=scenario.monthly_property_owning_cost,
+        property_appreciation=scenario.property_appreciation,
+        other_investment_roi=scenario.other_investment_roi,
+        initial_capital=scenario.initial_capital,
+        property_initial_value=scenario.property_initial_value,
+    )
+    parameters.update(overrides)
+    return evaluate(
+        number_of_years=scenario.number_of_years,
+        annual_payment_count=scenario.mortgage_payments_per_year,
+        **parameters
+    )
+
+
+class GridResult(object):
+    def __init__(self, interest_rates, appreciation_rates, investment_rois, initial_rents, result: BatchResult):
+        self.interest_rates = interest_rates
+        self.appreciation_rates = appreciation_rates
+        self.investment_rois = investment_rois
+        self.initial_rents = initial_rents
+        # Both are shaped (interest rates, appreciation rates, investment rois, initial rents)
+        self.final_equity_differences = result.final_equity_differences
+        self.tipping_years = result.tipping_years
+
+
+def evaluate_grid(scenario: Scenario, interest_rates=None, appreciation_rates=None, investment_rois=None,
+                  initial_rents=None) -> GridResult:
+    """
+    Evaluate the Cartesian grid of the given mortgage interest rates, property appreciation rates, investment ROIs
+    and initial monthly rents. A range that is not given stays fixed at the value from `scenario`.
+    """
+    interest_rates = np.atleast_1d(scenario.mortgage_interest_rate if interest_rates is None else interest_rates)
+    appreciation_rates = np.atleast_1d(
+        scenario.property_appreciation if appreciation_rates is None else appreciation_rates)
+    investment_rois = np.atleast_1d(scenario.other_investment_roi if investment_rois is None else investment_rois)
+    initial_rents = np.atleast_1d(scenario.initial_rent if initial_rents is None else initial_rents)
+
+    mesh = np.meshgrid(interest_rates, appreciation_rates, investment_rois, initial_rents, indexing='ij',
+                       sparse=True)
+    result = evaluate_scenario(
+        scenario,
+        mortgage_interest_rate=mesh[0],
+        property_appreciation=mesh[1],
+        other_investment_roi=mesh[2],
+        initial_rent=mesh[3],
+    )
+    return GridResult(interest_rates, appreciation_rates, investment_rois, initial_rents, result)
@@ -0,0 +1,41 @@
+"""
+Times the evaluation of a grid of scenarios with `batch.evaluate_grid`.
+
+    python -m benchmarks.batch_benchmark
+"""
+import timeit
+
+import numpy as np
+
+from batch import evaluate_grid
+from scenario import Scenario
+
+default_scenario = Scenario.from_inputs(
+    initial_rent=1500, inflation_rate=2, property_tax=650, condo_fee=100, insurance=50, utility_cost=100,
+    property_appreciation=3, mortgage_loan=400000, mortgage_interest_rate=3, mortgage_terms=25,
+    mortgage_payments_per_year=12, mortgage_down_payment=100000, welcome_tax=8000, legal_fee=1500,
+    other_investment_roi=3
+)
+
+
+def time_grid(size: int, repeat: int = 5, number: int = 3):
+    """Time a grid of `size` values along each of the four axes, i.e., `size ** 4` cells."""
+    timer = timeit.Timer(lambda: evaluate_grid(
+        default_scenario,
+        interest_rates=np.linspace(0.01, 0.08, size),
+        appreciation_rates=np.linspace(-0.02, 0.08, size),
+        investment_rois=np.linspace(0, 0.1, size),
+        initial_rents=np.linspace(1000, 4000, size),
+    ))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    print(f"{'cells':>8} {'time':>10} {'per cell':>10}")
+    for size in [5, 10, 15]:
+        seconds = time_grid(size)
+        print(f"{size ** 4:>8} {seconds * 1e3:>8.1f}ms {seconds / size ** 4 * 1e6:>8.2f}us")
+
+
+if __name__ == '__main__':
+    main()
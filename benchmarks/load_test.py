@@ -0,0 +1,309 @@
+"""
+A load generator which replays the callbacks of the page, as the browser sends them, from many simulated users.
+
+    python -m benchmarks.load_test --users 20 --duration 60          # against `python run.py`, started for the test
+    python -m benchmarks.load_test --url http://127.0.0.1:8050       # against a running server
+
+Every user loads the page, i.e., the layout, the dependencies and the initial callbacks, and then keeps editing a
+random input or switching to a random tab, waiting a random think time in between. An edit posts `calculate_loan` or
+`calculate_welcome_tax` if the input feeds them, then `update_output` and `store_state`, and with the new state, the
+summary and the tab shown. The requests are built from `/_dash-layout` and `/_dash-dependencies`, so everything runs
+offline against the real callback protocol.
+
+The report has the latency percentiles and the throughput of every callback. Every run is appended to
+`benchmarks/load_history.jsonl`.
+"""
+import argparse
+import datetime
+import gzip
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import id
+from benchmarks.startup_benchmark import start_server
+from benchmarks.suite import benchmarks_directory, git_revision
+
+default_history_path = os.path.join(benchmarks_directory, 'load_history.jsonl')
+
+# The name of a callback in the report, by its output
+callback_names = {
+    f"{id.input_mortgage_load}.value": 'calculate_loan',
+    f"{id.input_welcome_tax}.value": 'calculate_welcome_tax',
+    f"{id.memory_key}.children": 'update_output',
+    f"{id.memory_state}.children": 'store_state',
+    f"{id.graph_rent_or_buy}.children": 'render_summary',
+    f"{id.detailed_insights_tab_content}.children": 'render_tab',
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    :return: the nearest-rank percentile, e.g., the median for 0.5
+    """
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+class Stats(object):
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, error: bool = False):
+        with self._lock:
+            self.latencies[name].append(seconds)
+            if error:
+                self.errors[name] += 1
+
+    def summary(self, duration: float) -> dict:
+        summary = {}
+        for name, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            summary[name] = {
+                'requests': len(latencies),
+                'errors': self.errors[name],
+                'throughput': len(latencies) / duration,
+                'p50': percentile(latencies, 0.50),
+                'p95': percentile(latencies, 0.95),
+                'p99': percentile(latencies, 0.99),
+            }
+        return summary
+
+
+def find_values(layout) -> Dict[str, dict]:
+    """
+    :return: the props of every component with an id in the layout returned by /_dash-layout, by id
+    """
+    components = {}
+    pending = [layout]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, list):
+            pending.extend(node)
+        elif isinstance(node, dict) and 'props' in node:
+            props = node['props']
+            if props.get('id') is not None:
+                components[props['id']] = props
+            pending.append(props.get('children'))
+    return components
+
+
+class User(object):
+    """
+    One browser: its own connection, the values of its inputs, its memory_key and its memory_state.
+    """
+
+    def __init__(self, url: str, stats: Stats, think_seconds: float, seed: int):
+        parsed = urllib.parse.urlsplit(url)
+        self.connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+        self.stats = stats
+        self.think_seconds = think_seconds
+        self.random = random.Random(seed)
+        self.dependencies: Dict[str, dict] = {}
+        self.props: Dict[str, dict] = {}
+        self.values = {}
+        self.event_counts = defaultdict(int)
+        self.memory_key = None
+        self.memory_state = None
+        self.tab = id.TabValue.tab_value_rent
+
+    def send(self, method: str, path: str, body: Optional[dict]):
+        self.connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                                headers={'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'})
+        response = self.connection.getresponse()
+        content = response.read()
+        if response.getheader('Content-Encoding') == 'gzip':
+            content = gzip.decompress(content)
+        return response.status, content
+
+    def request(self, name: str, method: str, path: str, body: Optional[dict] = None):
+        started_at = time.perf_counter()
+        error = False
+        try:
+            try:
+                status, content = self.send(method, path, body)
+            except (ConnectionResetError, BrokenPipeError):
+                # The server closed the idle keep-alive connection, e.g., gthread after its `keepalive` seconds, and
+                # the browser retries on a new connection
+                self.connection.close()
+                status, content = self.send(method, path, body)
+            error = status >= 400
+            return status, json.loads(content) if status == 200 and content else None
+        except (OSError, http.client.HTTPException):
+            error = True
+            self.connection.close()
+            return None, None
+        finally:
+            self.stats.record(name, time.perf_counter() - started_at, error=error)
+
+    def value_of(self, dependency: dict):
+        component_id, name = dependency['id'], dependency['property']
+        if name in ('n_submit', 'n_blur'):
+            return self.event_counts[(component_id, name)] or None
+        if component_id == id.memory_key:
+            return self.memory_key
+        if component_id == id.memory_state:
+            return self.memory_state
+        if component_id == id.detailed_insights_tab:
+            return self.tab
+        return self.values.get(component_id)
+
+    def post_callback(self, output: str):
+        dependency = self.dependencies[output]
+        output_id, output_property = output.rsplit('.', 1)
+        body = {
+            'output': {'id': output_id, 'property': output_property},
+            'inputs': [dict(item, value=self.value_of(item)) for item in dependency['inputs']],
+            'state': [dict(item, value=self.value_of(item)) for item in dependency['state']],
+        }
+        status, content = self.request(callback_names.get(output, output), 'POST', '/_dash-update-component', body)
+        if status == 200:
+            return content['response']['props'][output_property]
+        return None
+
+    def load_page(self):
+        _, layout = self.request('layout', 'GET', '/_dash-layout')
+        _, dependencies = self.request('dependencies', 'GET', '/_dash-dependencies')
+        self.props = find_values(layout)
+        self.values = {component_id: props['value'] for component_id, props in self.props.items() if 'value' in props}
+        self.dependencies = {f"{item['output']['id']}.{item['output']['property']}": item for item in dependencies}
+        self.tab = self.props.get(id.detailed_insights_tab, {}).get('value', self.tab)
+
+        for output in [f"{id.input_mortgage_load}.value", f"{id.input_welcome_tax}.value"]:
+            self.calculate(output)
+        self.update_output()
+
+    def calculate(self, output: str):
+        """
+        Post a callback computing the value of an input, e.g., the loan, and keep the value like the page does.
+        """
+        value = self.post_callback(output)
+        if value is not None:
+            self.values[output.rsplit('.', 1)[0]] = value
+
+    def update_output(self):
+        memory_key = self.post_callback(f"{id.memory_key}.children")
+        if memory_key is None:
+            # Unchanged, the page keeps its graphs
+            return
+        self.memory_key = memory_key
+        memory_state = self.post_callback(f"{id.memory_state}.children")
+        if memory_state is None:
+            return
+        self.memory_state = memory_state
+        self.post_callback(f"{id.graph_rent_or_buy}.children")
+        self.post_callback(f"{id.detailed_insights_tab_content}.children")
+
+    def edit(self):
+        update = self.dependencies[f"{id.memory_key}.children"]
+        submitted = sorted({item['id'] for item in update['inputs'] if item['property'] == 'n_submit'})
+        chosen = sorted({item['id'] for item in update['inputs'] if item['property'] == 'value'})
+        component_id = self.random.choice(submitted + chosen)
+
+        if component_id in chosen:
+            self.values[component_id] = self.random.choice(self.props[component_id]['options'])['value']
+        else:
+            value = self.values[component_id] or 0
+            self.values[component_id] = round(value * self.random.uniform(0.8, 1.2), 2) if value else 1
+            self.event_counts[(component_id, self.random.choice(['n_submit', 'n_blur']))] += 1
+
+        for output in [f"{id.input_mortgage_load}.value", f"{id.input_welcome_tax}.value"]:
+            if any(item['id'] == component_id for item in self.dependencies[output]['inputs']):
+                self.calculate(output)
+        self.update_output()
+
+    def switch_tab(self):
+        self.tab = self.random.choice([tab for tab in id.TabValue.all_tabs if tab != self.tab])
+        self.post_callback(f"{id.detailed_insights_tab_content}.children")
+
+    def think(self):
+        if self.think_seconds:
+            time.sleep(self.random.expovariate(1 / self.think_seconds))
+
+    def run(self, deadline: float):
+        self.load_page()
+        while time.perf_counter() < deadline:
+            self.think()
+            if self.random.random() < 0.7:
+                self.edit()
+            else:
+                self.switch_tab()
+        self.connection.close()
+
+
+def run_load(url: str, users: int, duration: float, think_seconds: float, ramp_up_seconds: float,
+             seed: int = 0) -> dict:
+    stats = Stats()
+    started_at = time.perf_counter()
+    deadline = started_at + ramp_up_seconds + duration
+    threads = []
+    for i in range(users):
+        user = User(url, stats, think_seconds=think_seconds, seed=seed + i)
+        thread = threading.Thread(target=user.run, args=(deadline,), name=f'user-{i}', daemon=True)
+        thread.start()
+        threads.append(thread)
+        if ramp_up_seconds:
+            time.sleep(ramp_up_seconds / users)
+    for thread in threads:
+        thread.join()
+    return stats.summary(time.perf_counter() - started_at)
+
+
+def print_summary(summary: dict):
+    print(f"{'callback':<24} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, row in summary.items():
+        print(f"{name:<24} {row['requests']:>9} {row['errors']:>7} {row['throughput']:>8.1f} " +
+              " ".join(f"{row[key] * 1e3:>7.1f}ms" for key in ['p50', 'p95', 'p99']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay the callbacks of the page from many simulated users")
+    parser.add_argument('--url', default='', help="a running server, rather than starting one for the test")
+    parser.add_argument('--server', default='gunicorn-sync', help="waitress, gunicorn-sync or gunicorn-threaded")
+    parser.add_argument('--workers', type=int, default=3, help="the workers of the server started for the test")
+    parser.add_argument('--threads', type=int, default=2, help="the threads of every worker, or of waitress")
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=30, help="seconds, after the ramp up")
+    parser.add_argument('--think', type=float, default=1.0, help="the mean think time of a user, in seconds")
+    parser.add_argument('--ramp-up', type=float, default=5.0, help="seconds until every user started")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--history', default=default_history_path)
+    args = parser.parse_args(argv)
+
+    process, url = (None, args.url) if args.url else start_server(
+        args.workers, timeout=120, server_model=args.server, threads=args.threads)[:2]
+    try:
+        summary = run_load(url, users=args.users, duration=args.duration, think_seconds=args.think,
+                           ramp_up_seconds=args.ramp_up, seed=args.seed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    record = {
+        'time': datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.node(),
+        'settings': {key: value for key, value in vars(args).items() if key != 'history'},
+        'results': summary,
+    }
+    with open(args.history, 'a') as history:
+        history.write(json.dumps(record) + '\n')
+    print_summary(summary)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Measures the bytes held by one scenario, i.e., an AppState with its models, in the slotted, array-backed
+representation of the models, and in the previous representation of a per-instance `__dict__` with lists of floats.
+
+    python -m benchmarks.memory_benchmark
+"""
+import tracemalloc
+from types import SimpleNamespace
+
+from appstate import AppState, sections
+from benchmarks.batch_benchmark import default_scenario
+from scenario import Scenario
+from variable_settings import payment_frequency_options
+
+
+def as_dict_backed(state: AppState):
+    """The same state with every model in a `__dict__`, and every series in a list, as before."""
+    return SimpleNamespace(
+        number_of_years=state.number_of_years,
+        **{name: SimpleNamespace(**getattr(state, name).to_dict()) for name in sections}
+    )
+
+
+def measure_bytes(create, count: int = 200):
+    """The memory allocated per object by `create`, while `count` of them are alive."""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    objects = [create() for _ in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def main():
+    print(f"{'frequency':<12} {'before':>10} {'after':>10} {'ratio':>6}")
+    for option in payment_frequency_options:
+        inputs = default_scenario.to_dict()
+        inputs['mortgage_payments_per_year'] = option['value']
+        scenario = Scenario(**inputs)
+
+        before = measure_bytes(lambda: as_dict_backed(AppState.create(scenario)))
+        after = measure_bytes(lambda: AppState.create(scenario))
+        print(f"{option['label']:<12} {before / 1024:>8.1f}KB {after / 1024:>8.1f}KB {before / after:>5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""
+Times `montecarlo.simulate` in this process and on a process pool.
+
+    python -m benchmarks.montecarlo_benchmark
+"""
+import os
+import timeit
+
+from benchmarks.batch_benchmark import default_scenario
+from montecarlo import simulate
+
+
+def time_simulate(path_count: int, processes: int, repeat: int = 5):
+    # Warm up, so the process pool is already running
+    simulate(default_scenario, path_count=path_count, processes=processes)
+    timer = timeit.Timer(lambda: simulate(default_scenario, path_count=path_count, processes=processes))
+    return min(timer.repeat(repeat=repeat, number=1))
+
+
+def main():
+    process_counts = sorted({1, os.cpu_count() or 1})
+    print(f"{'paths':>8} " + " ".join(f"{f'{count} process(es)':>16}" for count in process_counts))
+    for path_count in [1000, 10000, 50000]:
+        print(f"{path_count:>8} " +
+              " ".join(f"{time_simulate(path_count, count) * 1e3:>14.1f}ms" for count in process_counts))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Compares the amortization engines of `Mortgage.create` at every payment frequency offered in the settings panel.
+
+    python -m benchmarks.mortgage_benchmark
+"""
+import timeit
+
+from mortgage import AmortizationEngine, Mortgage
+from variable_settings import amortization_period_options, payment_frequency_options
+
+engines = [AmortizationEngine.loop, AmortizationEngine.vectorized]
+
+
+def time_mortgage_create(engine: str, amortization_period: int, annual_payment_count: int, repeat: int = 5,
+                         number: int = 200):
+    timer = timeit.Timer(lambda: Mortgage.create(
+        loan=400000,
+        annual_interest_rate=0.03,
+        amortization_period=amortization_period,
+        annual_payment_count=annual_payment_count,
+        engine=engine
+    ))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    amortization_period = max(option['value'] for option in amortization_period_options)
+    print(f"Mortgage.create, {amortization_period} years, best time per call")
+    print(f"{'frequency':<12} {'payments':>8} " + " ".join(f"{engine:>12}" for engine in engines) + f" {'speedup':>8}")
+    for option in payment_frequency_options:
+        annual_payment_count = option['value']
+        seconds = [time_mortgage_create(engine, amortization_period, annual_payment_count) for engine in engines]
+        print(f"{option['label']:<12} {amortization_period * annual_payment_count:>8} " +
+              " ".join(f"{s * 1e6:>10.1f}us" for s in seconds) +
+              f" {seconds[0] / seconds[-1]:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
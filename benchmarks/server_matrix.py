@@ -0,0 +1,88 @@
+"""
+Runs the load test against every server model of `config.ServerModel`, with several mixes of processes and threads
+derived from the cores of this machine, to pick the fastest one for `run.py`.
+
+    python -m benchmarks.server_matrix --users 32 --duration 60
+
+Every configuration is started on its own and loaded with the same users and seed. The report has the throughput of
+all the callbacks together, and the p50 and p95 latency of `update_output` and `render_tab`, the most expensive ones.
+Every run is appended to `benchmarks/server_matrix_history.jsonl`.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+from collections import OrderedDict
+
+from benchmarks.load_test import run_load
+from benchmarks.startup_benchmark import start_server
+from benchmarks.suite import benchmarks_directory, git_revision
+
+default_history_path = os.path.join(benchmarks_directory, 'server_matrix_history.jsonl')
+
+
+def configurations(cores: int) -> list:
+    """
+    :return: (server model, workers, threads) to compare, e.g., one or two processes per core, with or without threads,
+        without duplicates, e.g., on a single core
+    """
+    return list(OrderedDict.fromkeys([
+        ('waitress', 1, 2 * cores),
+        ('gunicorn-sync', cores, 1),
+        ('gunicorn-sync', 2 * cores, 1),
+        ('gunicorn-threaded', cores, 2),
+        ('gunicorn-threaded', cores, 4),
+        ('gunicorn-threaded', max(cores // 2, 1), 4),
+    ]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the server models of run.py under the same load")
+    parser.add_argument('--users', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=60)
+    parser.add_argument('--think', type=float, default=0.5)
+    parser.add_argument('--ramp-up', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--history', default=default_history_path)
+    args = parser.parse_args(argv)
+
+    cores = os.cpu_count() or 1
+    rows = []
+    for server_model, workers, threads in configurations(cores):
+        process, url, _ = start_server(workers, timeout=120, server_model=server_model, threads=threads)
+        try:
+            summary = run_load(url, users=args.users, duration=args.duration, think_seconds=args.think,
+                               ramp_up_seconds=args.ramp_up, seed=args.seed)
+        finally:
+            process.terminate()
+            process.wait()
+        rows.append({'server': server_model, 'workers': workers, 'threads': threads, 'results': summary})
+
+    record = {
+        'time': datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.node(),
+        'cores': cores,
+        'settings': {key: value for key, value in vars(args).items() if key != 'history'},
+        'rows': rows,
+    }
+    with open(args.history, 'a') as history:
+        history.write(json.dumps(record) + '\n')
+
+    print(f"{cores} cores, {args.users} users, {args.think}s think time")
+    print(f"{'server':<18} {'workers':>7} {'threads':>7} {'req/s':>8} {'errors':>7} "
+          f"{'update p50':>11} {'update p95':>11} {'tab p50':>9} {'tab p95':>9}")
+    for row in rows:
+        results = row['results']
+        update, tab = results.get('update_output', {}), results.get('render_tab', {})
+        print(f"{row['server']:<18} {row['workers']:>7} {row['threads']:>7} "
+              f"{sum(result['throughput'] for result in results.values()):>8.1f} "
+              f"{sum(result['errors'] for result in results.values()):>7} "
+              f"{update.get('p50', float('nan')) * 1e3:>9.1f}ms {update.get('p95', float('nan')) * 1e3:>9.1f}ms "
+              f"{tab.get('p50', float('nan')) * 1e3:>7.1f}ms {tab.get('p95', float('nan')) * 1e3:>7.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
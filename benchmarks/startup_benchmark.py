@@ -0,0 +1,129 @@
+"""
+Reports the startup cost of the server: the time to import and warm up the app, and the memory of the master and of
+every worker of gunicorn, started by run.py. Every run is appended to
+`benchmarks/startup_history.jsonl`, to track the cost over releases.
+
+    python -m benchmarks.startup_benchmark [--workers 3]
+
+On Linux, `pss` is the share of the memory of a process, counting the pages shared copy-on-write with the other
+workers once across all of them, and `private` is the memory only this process uses.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.suite import benchmarks_directory, git_revision
+from startup import memory_bytes
+
+default_history_path = os.path.join(benchmarks_directory, 'startup_history.jsonl')
+repository_directory = os.path.dirname(benchmarks_directory)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def child_pids(pid: int) -> list:
+    children = []
+    for task in os.listdir(f'/proc/{pid}/task'):
+        with open(f'/proc/{pid}/task/{task}/children') as file:
+            children.extend(int(child) for child in file.read().split())
+    return sorted(children)
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float) -> dict:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {process.returncode}")
+        try:
+            with urllib.request.urlopen(url) as response:
+                return json.load(response)
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.05)
+    raise TimeoutError(f"{url} was not ready after {timeout}s")
+
+
+def start_server(workers: int, timeout: float, server_model: str = 'gunicorn-sync', threads: int = 2):
+    """
+    Start `python run.py` on a free port, with the caches, the metrics and the logs of its workers in memory.
+
+    :param server_model: one of `config.ServerModel`
+    :return: the process, its URL and the status of /ready, once it is ready
+    """
+    port = free_port()
+    environment = dict(os.environ, VANCOUVER_SCENARIO_CACHE_PATH='', VANCOUVER_METRICS_DIR='', VANCOUVER_LOG_PATH='',
+                       VANCOUVER_SERVER=server_model, VANCOUVER_WORKERS=str(workers), VANCOUVER_THREADS=str(threads),
+                       VANCOUVER_HOST='127.0.0.1', VANCOUVER_PORT=str(port))
+    process = subprocess.Popen([sys.executable, 'run.py'], cwd=repository_directory, env=environment,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    try:
+        status = wait_until_ready(f'{url}/ready', process, timeout)
+    except Exception:
+        process.terminate()
+        process.wait()
+        raise
+    return process, url, status
+
+
+def measure(workers: int, timeout: float) -> dict:
+    started_at = time.perf_counter()
+    process, _, status = start_server(workers, timeout)
+    try:
+        ready_seconds = time.perf_counter() - started_at
+        # Until every worker is forked
+        while len(child_pids(process.pid)) < workers and time.perf_counter() - started_at < timeout:
+            time.sleep(0.05)
+        return {
+            'workers': workers,
+            'ready_seconds': ready_seconds,
+            'import_seconds': status['import_seconds'],
+            'warm_steps': status['warm_steps'],
+            'master': memory_bytes(process.pid),
+            'worker_memory': [memory_bytes(pid) for pid in child_pids(process.pid)],
+        }
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the startup time and the memory of the workers")
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--history', default=default_history_path)
+    args = parser.parse_args(argv)
+
+    results = measure(args.workers, args.timeout)
+    record = {
+        'time': datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.node(),
+        'results': results,
+    }
+    with open(args.history, 'a') as history:
+        history.write(json.dumps(record) + '\n')
+
+    print(f"ready after {results['ready_seconds']:.2f}s, import {results['import_seconds']:.2f}s, " +
+          ", ".join(f"{step['name']} {step['seconds']:.2f}s" for step in results['warm_steps']))
+    print(f"{'process':<10} {'rss':>10} {'pss':>10} {'private':>10}")
+    for name, memory in [('master', results['master'])] + [
+            (f'worker {i + 1}', memory) for i, memory in enumerate(results['worker_memory'])]:
+        print(f"{name:<10} " + " ".join(f"{memory.get(field, 0) / 2 ** 20:>8.1f}MB"
+                                        for field in ['rss', 'pss', 'private']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Times decoding the dumped AppState for each view, fully with `AppState.from_json` and lazily with `LazyAppState`.
+
+    python -m benchmarks.state_benchmark
+"""
+import json
+import timeit
+
+import id
+from appstate import AppState, LazyAppState
+from benchmarks.batch_benchmark import default_scenario
+from scenario import Scenario
+from variable_settings import payment_frequency_options
+
+# The sections of the state that each view uses
+view_sections = {
+    'summary': ['renting_capital', 'property_value'],
+    id.TabValue.tab_value_rent: ['rent'],
+    id.TabValue.tab_value_mortgage_payment: ['mortgage'],
+    id.TabValue.tab_value_remaining_mortgage: ['mortgage'],
+    id.TabValue.tab_value_equity_by_rent: ['renting_capital'],
+    id.TabValue.tab_value_asset_for_buy: ['property_value'],
+    id.TabValue.tab_value_sensitivity: ['scenario'],
+}
+
+
+def decode_fully(state_json: str, sections):
+    state = AppState.from_json(json.loads(state_json))
+    for section in sections:
+        getattr(state, section)
+
+
+def decode_lazily(state_json: str, sections):
+    state = LazyAppState(state_json)
+    for section in sections:
+        getattr(state, section)
+
+
+def time_decode(decode, state_json: str, sections, repeat: int = 5, number: int = 100):
+    timer = timeit.Timer(lambda: decode(state_json, sections))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    for option in payment_frequency_options:
+        inputs = {field: getattr(default_scenario, field) for field in Scenario.fields}
+        inputs['mortgage_payments_per_year'] = option['value']
+        state_json = AppState.create(Scenario(**inputs)).dump()
+
+        print(f"{option['label']} payments, state is {len(state_json)} bytes")
+        print(f"{'view':<30} {'full':>10} {'lazy':>10}")
+        for view, sections in view_sections.items():
+            print(f"{view:<30} "
+                  f"{time_decode(decode_fully, state_json, sections) * 1e6:>8.1f}us "
+                  f"{time_decode(decode_lazily, state_json, sections) * 1e6:>8.1f}us")
+        print()
+
+
+if __name__ == '__main__':
+    main()
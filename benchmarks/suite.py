@@ -0,0 +1,241 @@
+"""
+The benchmark suite: times the models, the state encoding, the end-to-end callback and the views.
+
+    python -m benchmarks [--filter mortgage] [--save-baseline] [--check]
+
+Every run appends its results to a JSON lines history file and compares them with a stored baseline. Times are the
+best of several repeats, in seconds per call.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from collections import OrderedDict
+
+# The end-to-end benchmark must not share the scenario cache of a running server
+os.environ.setdefault('VANCOUVER_SCENARIO_CACHE_PATH', '')
+
+benchmarks_directory = os.path.dirname(os.path.abspath(__file__))
+default_history_path = os.path.join(benchmarks_directory, 'history.jsonl')
+default_baseline_path = os.path.join(benchmarks_directory, 'baseline.json')
+
+# A benchmark is a regression once it is this much slower than the baseline
+default_regression_threshold = 1.25
+
+
+def model_benchmarks():
+    import numpy as np
+
+    from benchmarks.batch_benchmark import default_scenario
+    from investments import PropertyValue, RentingCapital
+    from mortgage import Mortgage, piecewise_schedule
+    from rent import Rent
+    from tax import get_schedule
+    from variable_settings import amortization_period_options, payment_frequency_options
+
+    cases = OrderedDict()
+    for frequency in payment_frequency_options:
+        for period in amortization_period_options:
+            cases[f"mortgage.create[{frequency['value']}/year, {period['value']} years]"] = \
+                lambda frequency=frequency, period=period: Mortgage.create(
+                    loan=400000, annual_interest_rate=0.03, amortization_period=period['value'],
+                    annual_payment_count=frequency['value'])
+
+    rate_paths = np.random.RandomState(0).uniform(0.02, 0.07, size=(500, 5))
+    cases["mortgage.piecewise_schedule[500 paths, 5 terms]"] = lambda: piecewise_schedule(
+        400000, [5, 5, 5, 5, 5], rate_paths, amortization_period=25, annual_payment_count=12)
+
+    scenario = default_scenario
+    mortgage = Mortgage.create(loan=scenario.mortgage_loan, annual_interest_rate=scenario.mortgage_interest_rate,
+                               amortization_period=scenario.number_of_years,
+                               annual_payment_count=scenario.mortgage_payments_per_year)
+    rent = Rent.create_rent(initial_monthly_rent=scenario.initial_rent, inflation_rate=scenario.inflation_rate,
+                            number_of_years=scenario.number_of_years)
+
+    cases["rent.create_rent"] = lambda: Rent.create_rent(
+        initial_monthly_rent=scenario.initial_rent, inflation_rate=scenario.inflation_rate,
+        number_of_years=scenario.number_of_years)
+    cases["renting_capital.create"] = lambda: RentingCapital.create(
+        initial_capital=scenario.initial_capital, return_on_investment=scenario.other_investment_roi,
+        monthly_property_owning_cost=scenario.monthly_property_owning_cost, mortgage=mortgage, rent=rent,
+        number_of_years=scenario.number_of_years)
+    cases["property_value.create"] = lambda: PropertyValue.create(
+        initial_value=scenario.property_initial_value, appreciation_rate=scenario.property_appreciation,
+        mortgage=mortgage, number_of_years=scenario.number_of_years)
+
+    schedule = get_schedule('bc')
+    prices = np.linspace(100000, 4000000, 1000000)
+    cases["tax.tax"] = lambda: schedule.tax(850000, exemptions=['first_time_buyer'])
+    cases["tax.taxes[1M prices]"] = lambda: schedule.taxes(prices, exemptions=['first_time_buyer'])
+    return cases
+
+
+def state_benchmarks():
+    from appstate import AppState
+    from benchmarks.batch_benchmark import default_scenario
+
+    state = AppState.create(default_scenario)
+    state_json = state.dump()
+    compact_json = state.dump_compact()
+
+    cases = OrderedDict()
+    cases["appstate.create"] = lambda: AppState.create(default_scenario)
+    cases["appstate.dump"] = state.dump
+    cases["appstate.from_json"] = lambda: AppState.from_json(json.loads(state_json))
+    cases["appstate.dump_compact"] = state.dump_compact
+    cases["appstate.from_json[compact]"] = lambda: AppState.from_json(json.loads(compact_json))
+    return cases
+
+
+def callback_benchmarks():
+    import app
+    from benchmarks.batch_benchmark import default_scenario
+
+    scenario = default_scenario
+    states = [scenario.initial_rent, scenario.inflation_rate * 100, scenario.property_tax, scenario.condo_fee,
+              scenario.insurance, scenario.utility_cost, scenario.property_appreciation * 100, scenario.mortgage_loan,
+              scenario.mortgage_interest_rate * 100, scenario.mortgage_down_payment, scenario.welcome_tax,
+              scenario.legal_fee, scenario.other_investment_roi * 100]
+    # The n_submit and n_blur of the inputs before and after the two dropdowns, then the states, without a current key
+    arguments = [1] * 20 + [scenario.mortgage_terms, scenario.mortgage_payments_per_year] + [1] * 8 + states + [None]
+
+    def update_output_miss():
+        app.scenario_cache.clear()
+        app.scenario_graph.clear()
+        app.decoded_states.clear()
+        return app.update_output(*arguments)
+
+    def update_output_reused_models():
+        # A scenario missing from the cache, whose models are still memoized, e.g., after an edit and an undo
+        app.scenario_cache.clear()
+        return app.update_output(*arguments)
+
+    cases = OrderedDict()
+    cases["app.update_output[cache miss]"] = update_output_miss
+    cases["app.update_output[cache miss, models reused]"] = update_output_reused_models
+    cases["app.update_output[cache hit]"] = lambda: app.update_output(*arguments)
+    return cases
+
+
+def view_benchmarks():
+    import numpy as np
+
+    import formats
+    import views
+    from appstate import AppState
+    from batch import evaluate_grid
+    from benchmarks.batch_benchmark import default_scenario
+    from tipping_point import find_scenario_tipping_point
+
+    state = AppState.create(default_scenario)
+    years = state.x_axis_years
+    tipping_point = find_scenario_tipping_point(default_scenario)
+    grid = evaluate_grid(default_scenario, interest_rates=np.arange(1, 10.5, 0.5) / 100,
+                         appreciation_rates=np.arange(-2, 8.5, 0.5) / 100)
+
+    cases = OrderedDict()
+    cases["views.create_summary_graph"] = lambda: views.create_summary_graph(
+        years, state.renting_capital, state.property_value, tipping_point)
+    cases["views.create_equity_comparison_graph"] = lambda: views.create_equity_comparison_graph(
+        years, state.renting_capital, state.property_value, tipping_point)
+    cases["views.create_insights_tabs"] = views.create_insights_tabs
+    cases["views.create_rental_graph"] = lambda: views.create_rental_graph(years, state.rent)
+    cases["views.create_mortgage_payment_graph"] = lambda: views.create_mortgage_payment_graph(years, state.mortgage)
+    cases["views.create_mortgage_principle_graph"] = lambda: views.create_mortgage_principle_graph(
+        years, state.mortgage)
+    cases["views.create_renting_investment_portfolio"] = lambda: views.create_renting_investment_portfolio(
+        years, state.renting_capital)
+    cases["views.create_buying_investment_graph"] = lambda: views.create_buying_investment_graph(
+        years, state.property_value)
+    cases["views.create_sensitivity_heatmap"] = lambda: views.create_sensitivity_heatmap(grid)
+    cases["formats.money"] = lambda: formats.money(123456.789)
+    cases["formats.money_series"] = lambda: formats.money_series(state.property_value.value_by_year)
+    cases["formats.thousands_series"] = lambda: formats.thousands_series(state.mortgage.remaining_principles_by_year)
+    return cases
+
+
+def collect_benchmarks():
+    cases = OrderedDict()
+    for group in [model_benchmarks, state_benchmarks, callback_benchmarks, view_benchmarks]:
+        cases.update(group())
+    return cases
+
+
+def time_call(function, repeat: int):
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=benchmarks_directory,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """
+    :return: the names of the benchmarks which are slower than the baseline by more than `threshold`
+    """
+    regressions = []
+    print(f"{'benchmark':<56} {'time':>10} {'baseline':>10} {'ratio':>6}")
+    for name, seconds in results.items():
+        reference = baseline.get(name)
+        if reference:
+            ratio = seconds / reference
+            flag = " REGRESSION" if ratio > threshold else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<56} {seconds * 1e6:>8.1f}us {reference * 1e6:>8.1f}us {ratio:>5.2f}x{flag}")
+        else:
+            print(f"{name:<56} {seconds * 1e6:>8.1f}us {'-':>10} {'-':>6}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument('--filter', default='', help="only run the benchmarks whose name contains this")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--history', default=default_history_path)
+    parser.add_argument('--baseline', default=default_baseline_path)
+    parser.add_argument('--threshold', type=float, default=default_regression_threshold)
+    parser.add_argument('--save-baseline', action='store_true', help="store the results as the new baseline")
+    parser.add_argument('--check', action='store_true', help="exit with an error if there is any regression")
+    args = parser.parse_args(argv)
+
+    results = OrderedDict(
+        (name, time_call(function, repeat=args.repeat))
+        for name, function in collect_benchmarks().items() if args.filter in name
+    )
+
+    record = {
+        'time': datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.node(),
+        'results': results,
+    }
+    with open(args.history, 'a') as history:
+        history.write(json.dumps(record) + '\n')
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(record, baseline_file, indent=4)
+        print(f"Saved the baseline to {args.baseline}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.2f}x the baseline")
+        if args.check:
+            sys.exit(1)
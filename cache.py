@@ -0,0 +1,123 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ScenarioCache(object):
+    """
+    A string to string cache in a SQLite file, so that it can be shared by several processes, e.g., the workers of
+    gunicorn. Entries expire `ttl_seconds` after they are written, and the least recently used entries are evicted
+    once there are more than `max_entries` of them. Errors from SQLite are logged and treated as a miss.
+
+    The file outlives the server, so the entries are stored under their `version` too, e.g., of the format of the
+    values: the entries written with another version are a miss, and expire or are evicted like any other.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: float = 24 * 60 * 60, clock=time.time,
+                 version: str = ''):
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not be shared across threads, nor survive a fork
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def _versioned(self, key: str) -> str:
+        return f'{self.version}:{key}' if self.version else key
+
+    def get(self, key: str) -> Optional[str]:
+        key = self._versioned(key)
+        try:
+            connection = self._connection()
+            now = self.clock()
+            row = connection.execute('SELECT value, created FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if now - created > self.ttl_seconds:
+                connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+                return None
+            connection.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+            return value
+        except sqlite3.Error:
+            logger.warning("Scenario cache read failed", exc_info=True)
+            return None
+
+    def put(self, key: str, value: str):
+        key = self._versioned(key)
+        try:
+            connection = self._connection()
+            now = self.clock()
+            connection.execute('INSERT OR REPLACE INTO entries (key, value, created, accessed) VALUES (?, ?, ?, ?)',
+                               (key, value, now, now))
+            connection.execute(
+                'DELETE FROM entries WHERE key IN ('
+                'SELECT key FROM entries ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+        except sqlite3.Error:
+            logger.warning("Scenario cache write failed", exc_info=True)
+
+    def clear(self):
+        try:
+            self._connection().execute('DELETE FROM entries')
+        except sqlite3.Error:
+            logger.warning("Scenario cache clear failed", exc_info=True)
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+
+class MemoryCache(object):
+    """
+    A least recently used cache in the memory of this process, with the same interface as `ScenarioCache`. Unlike
+    `ScenarioCache`, the values can be any object.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,121 @@
+"""
+The models of a scenario as a dependency graph, so that an edit only recomputes the models downstream of it:
+
+    mortgage ──┬──> renting_capital
+    rent ──────┘
+    mortgage ────> property_value
+
+Every node is memoized on its own inputs, i.e., the fields of the scenario it reads and the keys of the nodes it
+depends on. Changing the ROI only recomputes `renting_capital`, and changing the rent only recomputes `rent` and
+`renting_capital`, reusing the mortgage and its amortization schedule.
+"""
+from collections import Counter, namedtuple
+from typing import Callable, Dict, Optional
+
+from cache import MemoryCache
+from investments import PropertyValue, RentingCapital
+from mortgage import Mortgage
+from rent import Rent
+from scenario import Scenario
+
+# `inputs` are the properties of the scenario read by `create`, `dependencies` are the nodes passed to it by name
+Node = namedtuple('Node', ['inputs', 'dependencies', 'create'])
+
+# In topological order
+nodes = {
+    'mortgage': Node(
+        inputs=['mortgage_loan', 'mortgage_interest_rate', 'mortgage_terms', 'mortgage_payments_per_year'],
+        dependencies=[],
+        create=lambda scenario: Mortgage.create(
+            loan=scenario.mortgage_loan,
+            annual_interest_rate=scenario.mortgage_interest_rate,
+            amortization_period=scenario.number_of_years,
+            annual_payment_count=scenario.mortgage_payments_per_year
+        )
+    ),
+    'rent': Node(
+        inputs=['initial_rent', 'inflation_rate', 'mortgage_terms'],
+        dependencies=[],
+        create=lambda scenario: Rent.create_rent(
+            initial_monthly_rent=scenario.initial_rent,
+            inflation_rate=scenario.inflation_rate,
+            number_of_years=scenario.number_of_years
+        )
+    ),
+    'renting_capital': Node(
+        inputs=['initial_capital', 'other_investment_roi', 'monthly_property_owning_cost', 'mortgage_terms'],
+        dependencies=['mortgage', 'rent'],
+        create=lambda scenario, mortgage, rent: RentingCapital.create(
+            initial_capital=scenario.initial_capital,
+            return_on_investment=scenario.other_investment_roi,
+            monthly_property_owning_cost=scenario.monthly_property_owning_cost,
+            mortgage=mortgage,
+            rent=rent,
+            number_of_years=scenario.number_of_years
+        )
+    ),
+    'property_value': Node(
+        inputs=['property_initial_value', 'property_appreciation', 'mortgage_terms'],
+        dependencies=['mortgage'],
+        create=lambda scenario, mortgage: PropertyValue.create(
+            initial_value=scenario.property_initial_value,
+            appreciation_rate=scenario.property_appreciation,
+            mortgage=mortgage,
+            number_of_years=scenario.number_of_years,
+            real_estate_commission=0.05
+        )
+    ),
+}
+
+
+def compute(scenario: Scenario) -> dict:
+    """
+    :return: every model of the scenario by the name of its node, without any memoization
+    """
+    components = {}
+    for name, node in nodes.items():
+        components[name] = node.create(scenario, *[components[dependency] for dependency in node.dependencies])
+    return components
+
+
+class ScenarioGraph(object):
+    """
+    Computes the models of a scenario, reusing the models of the previous scenarios whose inputs are unchanged. Every
+    node keeps its last `max_entries` models in memory.
+    """
+
+    def __init__(self, max_entries: int = 64, listener: Optional[Callable[[str, bool], None]] = None):
+        """
+        :param listener: called with the name of the node and whether it was memoized, on every lookup
+        """
+        self.caches = {name: MemoryCache(max_entries=max_entries) for name in nodes}
+        self.listener = listener
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def compute(self, scenario: Scenario) -> dict:
+        """
+        :return: every model of the scenario by the name of its node
+        """
+        keys: Dict[str, tuple] = {}
+        components = {}
+        for name, node in nodes.items():
+            # Canonical like `Scenario.key`, so that 3 and 3.0 are the same input
+            keys[name] = tuple(float(getattr(scenario, field)) for field in node.inputs) + tuple(
+                keys[dependency] for dependency in node.dependencies)
+
+            component = self.caches[name].get(keys[name])
+            hit = component is not None
+            if not hit:
+                component = node.create(scenario, *[components[dependency] for dependency in node.dependencies])
+                self.caches[name].put(keys[name], component)
+            components[name] = component
+
+            (self.hits if hit else self.misses)[name] += 1
+            if self.listener is not None:
+                self.listener(name, hit)
+        return components
+
+    def clear(self):
+        for cache in self.caches.values():
+            cache.clear()
@@ -0,0 +1,98 @@
+"""
+Server settings, which can be overridden with environment variables.
+"""
+import os
+import tempfile
+
+
+class ServerModel:
+    # One process serving the requests with a pool of threads
+    waitress = 'waitress'
+    # gunicorn processes serving one request at a time each
+    gunicorn_sync = 'gunicorn-sync'
+    # gunicorn processes serving the requests with a pool of threads each
+    gunicorn_threaded = 'gunicorn-threaded'
+
+
+# How `python run.py` serves the app. The callbacks are short and CPU bound, so with the GIL, processes rather than
+# threads make use of the cores, and a few threads per process only overlap the I/O of the requests. See the results
+# of benchmarks.server_matrix in the readme.
+server_model = os.environ.get('VANCOUVER_SERVER', ServerModel.gunicorn_sync)
+server_host = os.environ.get('VANCOUVER_HOST', '0.0.0.0')
+server_port = int(os.environ.get('VANCOUVER_PORT', 8080))
+# The gunicorn workers, one per core by default
+server_workers = int(os.environ.get('VANCOUVER_WORKERS', os.cpu_count() or 1))
+# The threads of every gunicorn worker, or of waitress, by default 2 per worker, or 2 per core for waitress
+server_threads = int(os.environ.get(
+    'VANCOUVER_THREADS', 2 * (os.cpu_count() or 1) if server_model == ServerModel.waitress else 2))
+
+
+class StateStorage:
+    # The whole AppState is kept in the hidden memory_state div in the browser
+    client = 'client'
+    # The AppState is kept in the scenario cache on the server, and the div only holds its key
+    server = 'server'
+
+
+state_storage = os.environ.get('VANCOUVER_STATE_STORAGE', StateStorage.client)
+
+
+class StateEncoding:
+    # Every series of every model, including the per-payment mortgage schedule, see `AppState.dump`
+    json = 'json'
+    # Only the yearly series, packed as base64 floats, see `AppState.dump_compact`
+    compact = 'compact'
+
+
+state_encoding = os.environ.get('VANCOUVER_STATE_ENCODING', StateEncoding.compact)
+# Round the series of the compact encoding to cents, packed as integers, which makes the state about 30% smaller
+state_round_to_cents = os.environ.get('VANCOUVER_STATE_ROUND_TO_CENTS', '0') == '1'
+
+# The scenario cache is a SQLite file shared by all the workers of the server. Set the path to '' to keep a separate
+# cache in the memory of each worker instead.
+scenario_cache_path = os.environ.get(
+    'VANCOUVER_SCENARIO_CACHE_PATH',
+    os.path.join(tempfile.gettempdir(), 'vancouver-scenario-cache.sqlite3')
+)
+scenario_cache_max_entries = int(os.environ.get('VANCOUVER_SCENARIO_CACHE_MAX_ENTRIES', 10000))
+scenario_cache_ttl_seconds = float(os.environ.get('VANCOUVER_SCENARIO_CACHE_TTL_SECONDS', 24 * 60 * 60))
+
+# The models of the recent scenarios kept in the memory of each worker, by model, so that an edit only recomputes the
+# models which depend on it, see `components`
+component_cache_max_entries = int(os.environ.get('VANCOUVER_COMPONENT_CACHE_MAX_ENTRIES', 64))
+
+# The annuity table of `mortgage.annuity_table` covers the rates from 0% up to this one, in whole percents, for every
+# term of the settings panel. Set it to '' to compute every schedule directly.
+annuity_table_max_rate = os.environ.get('VANCOUVER_ANNUITY_TABLE_MAX_RATE', '20')
+
+# Responses smaller than this are sent as they are, the others are compressed with the first of the algorithms the
+# browser accepts, see `static`
+compress_min_bytes = int(os.environ.get('VANCOUVER_COMPRESS_MIN_BYTES', 500))
+compress_algorithms = [name for name in os.environ.get('VANCOUVER_COMPRESS_ALGORITHMS', 'br,gzip').split(',') if name]
+compress_level = int(os.environ.get('VANCOUVER_COMPRESS_LEVEL', 6))
+
+# The most scenarios evaluated by one request to the JSON API
+api_max_scenarios = int(os.environ.get('VANCOUVER_API_MAX_SCENARIOS', 10000))
+
+# Every worker writes its metrics to this directory, and /metrics adds them up. Set it to '' to only report the metrics
+# of the worker answering the request.
+metrics_dir = os.environ.get('VANCOUVER_METRICS_DIR', os.path.join(tempfile.gettempdir(), 'vancouver-metrics'))
+metrics_flush_seconds = float(os.environ.get('VANCOUVER_METRICS_FLUSH_SECONDS', 1))
+
+# The log file, or '' to only log to the console. Every worker of gunicorn writes its own file, e.g., Vancouver.2.log
+# for the worker of slot 2, unless VANCOUVER_LOG_PER_WORKER is '0'.
+log_path = os.environ.get('VANCOUVER_LOG_PATH', 'Vancouver.log')
+log_per_worker = os.environ.get('VANCOUVER_LOG_PER_WORKER', '1') == '1'
+log_max_bytes = int(os.environ.get('VANCOUVER_LOG_MAX_BYTES', 10 * 1024 * 1024))
+log_backup_count = int(os.environ.get('VANCOUVER_LOG_BACKUP_COUNT', 5))
+# Only log one in every n calls of a callback, e.g., 'calculate_loan=10,choose_tab=10', see `logs.SamplingFilter`
+log_sampling = os.environ.get('VANCOUVER_LOG_SAMPLING', '')
+
+# The property transfer tax schedule of `tax.schedules`, and its exemptions, e.g., 'first_time_buyer,newly_built'
+tax_jurisdiction = os.environ.get('VANCOUVER_TAX_JURISDICTION', 'montreal')
+tax_exemptions = [name for name in os.environ.get('VANCOUVER_TAX_EXEMPTIONS', '').split(',') if name]
+
+# The rendered tabs kept in the memory of each worker, and the threads rendering the other tabs of a state in the
+# background. Set the threads to 0 to only render the tab shown.
+tab_cache_max_entries = int(os.environ.get('VANCOUVER_TAB_CACHE_MAX_ENTRIES', 256))
+tab_prefetch_threads = int(os.environ.get('VANCOUVER_TAB_PREFETCH_THREADS', 2))
@@ -0,0 +1,139 @@
+"""
+Exports of the per-payment amortization schedule of a mortgage: the date, the payment, the interest, the principal and
+the remaining balance of every payment.
+
+The schedule is generated a chunk of payments at a time, with the same closed forms as `Mortgage.create`, so that an
+export starts right away and holds one chunk in memory, however many payments there are.
+
+Two formats are streamed from it: CSV, and a columnar binary format for analysts, which is
+
+    b'VSCH' | version: uint32 | header length: uint32 | header: JSON
+    then for every chunk: row count: uint32 | every column, as the little-endian array of its dtype
+    then a row count of 0
+
+The JSON header lists the columns with their dtype, and the parameters of the mortgage. The dates are days since
+1970-01-01. `read_columnar` decodes it into numpy arrays.
+"""
+import calendar
+import csv
+import datetime
+import io
+import json
+import struct
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from mortgage import annuity_payment, remaining_balance
+
+# Payments per chunk, which bounds the memory of an export
+default_chunk_size = 256
+
+columns = ['date', 'payment', 'interest', 'principal', 'balance']
+column_dtypes = {'date': '<i4', 'payment': '<f8', 'interest': '<f8', 'principal': '<f8', 'balance': '<f8'}
+
+columnar_magic = b'VSCH'
+columnar_version = 1
+epoch = datetime.date(1970, 1, 1)
+
+
+def add_months(start: datetime.date, months: int) -> datetime.date:
+    """
+    :return: e.g., 2024-02-29 for 2024-01-31 and 1 month
+    """
+    year, month = divmod(start.month - 1 + months, 12)
+    year += start.year
+    return start.replace(year=year, month=month + 1, day=min(start.day, calendar.monthrange(year, month + 1)[1]))
+
+
+def payment_date(start: datetime.date, annual_payment_count: int, payments_made: int) -> datetime.date:
+    """
+    The date of the payment after `payments_made` payments: every n months when n payments a year divide 12, twice a
+    month, 14 days apart, for 24, and every 7 or 14 days for 52 or 26, i.e., every 364 / n days.
+    """
+    if 12 % annual_payment_count == 0:
+        return add_months(start, payments_made * (12 // annual_payment_count))
+    if annual_payment_count == 24:
+        return add_months(start, payments_made // 2) + datetime.timedelta(days=14 * (payments_made % 2))
+    if 364 % annual_payment_count == 0:
+        return start + datetime.timedelta(days=payments_made * (364 // annual_payment_count))
+    return start + datetime.timedelta(days=round(payments_made * 365.25 / annual_payment_count))
+
+
+def schedule_chunks(loan: float, annual_interest_rate: float, amortization_period: int, annual_payment_count: int,
+                    start: datetime.date, chunk_size: int = default_chunk_size) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    :param annual_interest_rate: e.g., 0.03
+    :param start: the date of the first payment
+    :return: the columns of `chunk_size` payments at a time, the dates as days since 1970-01-01
+    """
+    payment_count = amortization_period * annual_payment_count
+    period_rate = annual_interest_rate / annual_payment_count
+    payment = float(annuity_payment(loan, period_rate, payment_count))
+
+    for first in range(0, payment_count, chunk_size):
+        payments_made = np.arange(first, min(first + chunk_size, payment_count))
+        opening_balances = remaining_balance(loan, period_rate, payment, payments_made)
+        interest = opening_balances * period_rate
+        principal = payment - interest
+        yield {
+            'date': np.array([(payment_date(start, annual_payment_count, index) - epoch).days
+                              for index in payments_made.tolist()], dtype=column_dtypes['date']),
+            'payment': np.full(len(payments_made), payment),
+            'interest': interest,
+            'principal': principal,
+            # The rounding errors of the closed forms leave the last balance slightly below 0, i.e., -0.00 in a CSV
+            'balance': np.maximum(opening_balances - principal, 0.0),
+        }
+
+
+def csv_chunks(chunks: Iterator[Dict[str, np.ndarray]]) -> Iterator[str]:
+    """
+    :return: the header, and then the rows of every chunk, with the amounts in cents
+    """
+    yield ','.join(columns) + '\r\n'
+    for chunk in chunks:
+        text = io.StringIO()
+        writer = csv.writer(text)
+        dates = [(epoch + datetime.timedelta(days=day)).isoformat() for day in chunk['date'].tolist()]
+        amounts = [[f'{value:.2f}' for value in chunk[column].tolist()] for column in columns[1:]]
+        writer.writerows(zip(dates, *amounts))
+        yield text.getvalue()
+
+
+def columnar_chunks(chunks: Iterator[Dict[str, np.ndarray]], parameters: dict) -> Iterator[bytes]:
+    """
+    :param parameters: stored in the header, e.g., the loan
+    """
+    header = json.dumps({
+        'columns': [{'name': column, 'dtype': column_dtypes[column]} for column in columns],
+        'parameters': parameters,
+    }).encode()
+    yield columnar_magic + struct.pack('<II', columnar_version, len(header)) + header
+    for chunk in chunks:
+        yield struct.pack('<I', len(chunk['date'])) + b''.join(
+            np.ascontiguousarray(chunk[column], dtype=column_dtypes[column]).tobytes() for column in columns)
+    yield struct.pack('<I', 0)
+
+
+def read_columnar(file: BinaryIO) -> Tuple[Dict[str, np.ndarray], dict]:
+    """
+    :return: every column as one numpy array, and the parameters of the header
+    """
+    if file.read(4) != columnar_magic:
+        raise ValueError("Not a columnar amortization schedule")
+    version, header_length = struct.unpack('<II', file.read(8))
+    if version != columnar_version:
+        raise ValueError(f"Unsupported version of the columnar amortization schedule: {version}")
+    header = json.loads(file.read(header_length))
+
+    dtypes = [(column['name'], np.dtype(column['dtype'])) for column in header['columns']]
+    parts: Dict[str, List[np.ndarray]] = {name: [] for name, _ in dtypes}
+    while True:
+        row_count, = struct.unpack('<I', file.read(4))
+        if row_count == 0:
+            break
+        for name, dtype in dtypes:
+            parts[name].append(np.frombuffer(file.read(row_count * dtype.itemsize), dtype=dtype))
+    return {name: np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+            for (name, dtype), arrays in zip(dtypes, parts.values())}, header['parameters']
@@ -1,9 +1,113 @@
+import decimal
+import math
+from functools import lru_cache
+from typing import List
+
 import babel.numbers
+import numpy as np
+from babel import Locale
+
+
+class MoneyFormatter(object):
+    """
+    Formats amounts like `babel.numbers.format_currency`, with the locale, the symbols and the pattern looked up once.
+    Amounts are formatted with Python's float formatting, and only go through `decimal` when their rounding is a tie,
+    so that they round half to even like babel does.
+    """
+
+    def __init__(self, locale: str = 'en_US', currency: str = 'USD'):
+        self.locale = Locale.parse(locale)
+        self.currency = currency
+        pattern = self.locale.currency_formats['standard']
+        symbol = babel.numbers.get_currency_symbol(currency, self.locale)
+        self.positive_prefix, self.negative_prefix = (prefix.replace('¤', symbol) for prefix in pattern.prefix)
+        self.positive_suffix, self.negative_suffix = (suffix.replace('¤', symbol) for suffix in pattern.suffix)
+        self.digits = babel.numbers.get_currency_precision(currency)
+        self.number_format = f",.{self.digits}f"
+        self.quantum = decimal.Decimal(1).scaleb(-self.digits)
+        self.symbols = str.maketrans({
+            ',': babel.numbers.get_group_symbol(self.locale),
+            '.': babel.numbers.get_decimal_symbol(self.locale),
+        })
+        # Patterns the float formatting can not reproduce, e.g., the grouping of lakhs, are left to babel
+        self.fast = pattern.grouping == (3, 3) and all(
+            self.format_fast(value) == self.format_babel(value) for value in [-1234567.125, -0.0, 0, 0.5, 1234.565])
+
+    def format_babel(self, value) -> str:
+        return babel.numbers.format_currency(number=value, currency=self.currency, locale=self.locale)
+
+    def format_fast(self, value) -> str:
+        value = float(value)
+        if not math.isfinite(value):
+            return self.format_babel(value)
+        negative = math.copysign(1.0, value) < 0
+        value = abs(value)
+
+        text = repr(value)
+        fraction_digits = len(text) - text.find('.') - 1
+        if 'e' in text or (fraction_digits == self.digits + 1 and text[-1] == '5'):
+            # Round the shortest decimal representation of the value, as babel does
+            number = format(decimal.Decimal(text).quantize(self.quantum, rounding=decimal.ROUND_HALF_EVEN),
+                            self.number_format)
+        else:
+            number = format(value, self.number_format)
+
+        number = number.translate(self.symbols)
+        if negative:
+            return self.negative_prefix + number + self.negative_suffix
+        return self.positive_prefix + number + self.positive_suffix
+
+    def __call__(self, value) -> str:
+        if self.fast:
+            return self.format_fast(value)
+        return self.format_babel(value)
+
+    def format_series(self, values) -> List[str]:
+        """
+        :param values: e.g., a series of a model
+        :return: the formatted amounts, in the same order
+        """
+        format_value = self.format_fast if self.fast else self.format_babel
+        return [format_value(value) for value in np.asarray(values, dtype=np.float64).tolist()]
+
+
+@lru_cache(maxsize=None)
+def get_money_formatter(locale: str = 'en_US', currency: str = 'USD') -> MoneyFormatter:
+    return MoneyFormatter(locale=locale, currency=currency)
 
 
 def money(value):
-    return babel.numbers.format_currency(number=value, currency="USD", locale='en_US')
+    return get_money_formatter()(value)
+
+
+def money_series(values) -> List[str]:
+    return get_money_formatter().format_series(values)
 
 
 def percentage(value):
     return '{:.1%}'.format(value)
+
+
+def percentage_series(values) -> List[str]:
+    return ['{:.1%}'.format(value) for value in np.asarray(values, dtype=np.float64).tolist()]
+
+
+def thousands_series(values) -> List[str]:
+    """
+    :return: e.g., ['400.0k', '387.123k'] for [399999.6, 387123.4]
+    """
+    # Adding 0 turns the -0.0 of a paid off mortgage into 0.0
+    return [f"{value}k" for value in (np.round(np.asarray(values, dtype=np.float64)) / 1000 + 0.0).tolist()]
+
+
+def duration(months: int):
+    """
+    :return: e.g., '1 year and 2 months' for 14 months
+    """
+    years, months = divmod(months, 12)
+    parts = []
+    if years:
+        parts.append(f"{years} year{'s' if years != 1 else ''}")
+    if months or not years:
+        parts.append(f"{months} month{'s' if months != 1 else ''}")
+    return " and ".join(parts)
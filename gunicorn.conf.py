@@ -0,0 +1,36 @@
+"""
+The gunicorn settings of vancouver.service.
+
+The master imports and warms up the app once, see `startup`, and then forks the workers, which share its memory
+copy-on-write rather than each importing the app, loading the locale data and computing the default scenario again.
+"""
+import gc
+import itertools
+
+preload_app = True
+
+
+def when_ready(server):
+    import app
+
+    # The counts of the warm up would be counted once per worker, which all inherit them
+    app.metrics.registry.stop_flushing()
+
+    # Move everything the master allocated out of the reach of the garbage collector, which would otherwise touch,
+    # and so copy, every page of it in every worker
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    # The lowest slot no live worker holds, so that a worker replacing another one takes over its log file and its
+    # metrics snapshot
+    taken = {getattr(other, 'slot', None) for other in server.WORKERS.values()}
+    worker.slot = next(slot for slot in itertools.count(1) if slot not in taken)
+
+
+def post_fork(server, worker):
+    import app
+
+    # The thread writing the logs is not forked, and every worker writes its own file
+    app.log_pipeline.restart(slot=worker.slot)
+    app.metrics.registry.reset(slot=worker.slot)
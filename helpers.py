@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def inflate_value(initial: float, inflation_rate, count):
     result = []
     current_value = initial
@@ -6,3 +9,56 @@ def inflate_value(initial: float, inflation_rate, count):
         result.append(current_value)
         current_value = current_value * multiplier
     return result
+
+
+def as_series(values):
+    """
+    Store a series of numbers as a compact float64 numpy array rather than a list of boxed floats.
+    """
+    if values is None:
+        return None
+    return np.asarray(values, dtype=float)
+
+
+class Serializable(object):
+    """
+    The serialization protocol of the models. Subclasses list their attributes in `scalar_fields` and
+    `series_fields`, and accept all of them as keyword arguments of their constructor, so that
+    `cls(**obj.to_dict())` is a copy of `obj`.
+    """
+    # The values of the `memoized_property`s
+    __slots__ = ('_memo',)
+
+    scalar_fields = []
+    # Stored with `as_series`
+    series_fields = []
+
+    def to_dict(self) -> dict:
+        json_data = {field: getattr(self, field) for field in self.scalar_fields}
+        for field in self.series_fields:
+            values = getattr(self, field)
+            json_data[field] = None if values is None else values.tolist()
+        return json_data
+
+
+class memoized_property(object):
+    """
+    A property of a `Serializable` computed on its first access only, e.g., a description, which is formatted once per
+    model rather than on every render.
+    """
+
+    def __init__(self, function):
+        self.function = function
+        self.name = function.__name__
+        self.__doc__ = function.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            memo = instance._memo
+        except AttributeError:
+            memo = instance._memo = {}
+        if self.name not in memo:
+            memo[self.name] = self.function(instance)
+        return memo[self.name]
@@ -36,7 +36,18 @@ class TabValue:
     tab_value_remaining_mortgage = 'tab_value_remaining_mortgage'
     tab_value_equity_by_rent = 'tab_value_equity_by_rent'
     tab_value_asset_for_buy = 'tab_value_asset_for_buy'
+    tab_value_sensitivity = 'tab_value_sensitivity'
+
+    all_tabs = [
+        tab_value_rent,
+        tab_value_mortgage_payment,
+        tab_value_remaining_mortgage,
+        tab_value_equity_by_rent,
+        tab_value_asset_for_buy,
+        tab_value_sensitivity,
+    ]
 
 
 # State
 memory_state = "memory_state"
+memory_key = "memory_key"
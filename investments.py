@@ -1,10 +1,16 @@
 from mortgage import Mortgage
 from formats import money, percentage
 from rent import Rent
+from helpers import Serializable, as_series, memoized_property
 import helpers
 
 
-class RentingCapital(object):
+class RentingCapital(Serializable):
+    scalar_fields = ['description']
+    series_fields = ['capitals', 'investments', 'yearly_property_owning_costs', 'rent_yearly_payments',
+                     'mortgage_yearly_payment']
+    __slots__ = scalar_fields + series_fields
+
     @classmethod
     def create(cls, initial_capital: float, return_on_investment: float, monthly_property_owning_cost: float,
                mortgage, rent: Rent, number_of_years: int):
@@ -55,17 +61,23 @@ class RentingCapital(object):
             yearly_property_owning_costs,
             rent_yearly_payments,
             mortgage_yearly_payment,
-            description
+            description,
+            *args,
+            **kwargs
     ):
-        self.capitals = capitals
-        self.investments = investments
-        self.yearly_property_owning_costs = yearly_property_owning_costs
-        self.rent_yearly_payments = rent_yearly_payments
-        self.mortgage_yearly_payment = mortgage_yearly_payment
+        self.capitals = as_series(capitals)
+        self.investments = as_series(investments)
+        self.yearly_property_owning_costs = as_series(yearly_property_owning_costs)
+        self.rent_yearly_payments = as_series(rent_yearly_payments)
+        self.mortgage_yearly_payment = as_series(mortgage_yearly_payment)
         self.description = description
 
 
-class PropertyValue(object):
+class PropertyValue(Serializable):
+    scalar_fields = ['appreciation_rate', 'real_estate_commission', 'initial_value']
+    series_fields = ['value_by_year', 'equity_by_year']
+    __slots__ = scalar_fields + series_fields
+
     @classmethod
     def create(cls, initial_value, appreciation_rate, mortgage: Mortgage, number_of_years,
                real_estate_commission: float = 0.05):
@@ -93,10 +105,10 @@ class PropertyValue(object):
         self.appreciation_rate = appreciation_rate
         self.real_estate_commission = real_estate_commission
         self.initial_value = initial_value
-        self.value_by_year = value_by_year
-        self.equity_by_year = equity_by_year
+        self.value_by_year = as_series(value_by_year)
+        self.equity_by_year = as_series(equity_by_year)
 
-    @property
+    @memoized_property
     def description(self):
         return f"The property is estimated to appreciate {percentage(self.appreciation_rate)} per year. " \
             f"The initial value of the property is {money(self.initial_value)}. " \
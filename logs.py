@@ -0,0 +1,171 @@
+"""
+Logging off the request thread.
+
+The loggers only put their records on a queue, and a background `QueueListener` formats them and writes them to the
+console and to a rotating log file. Every worker of the server writes its own file, e.g., `Vancouver.2.log`, so the
+workers never share a file, nor rotate it under each other. The files are named by the slot of the worker rather than
+its pid, see gunicorn.conf.py, so a worker replacing another, e.g., after a crash, appends to the file of the one it
+replaces, and there are never more files than workers.
+
+Messages are %-style, e.g., `logger.info("Choose tab %s", tab)`, and only formatted by the listener, if at all.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import Dict, Optional
+
+import config
+
+formatter = logging.Formatter("%(asctime)s [%(threadName)-12.12s] [%(levelname)-5.5s]  %(message)s")
+
+
+def parse_sampling(text: str) -> Dict[str, int]:
+    """
+    :param text: e.g., 'calculate_loan=10,choose_tab=5'
+    :return: e.g., {'calculate_loan': 10, 'choose_tab': 5}
+    """
+    sampling = {}
+    for item in text.split(','):
+        if item.strip():
+            name, every = item.split('=')
+            sampling[name.strip()] = int(every)
+    return sampling
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep one in every n records below WARNING of a callback. The callback of a record is given as
+    `extra={'callback': name}`, records without it are all kept.
+    """
+
+    def __init__(self, sampling: Dict[str, int]):
+        super().__init__()
+        self.sampling = sampling
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        every = self.sampling.get(getattr(record, 'callback', None))
+        if not every or every <= 1 or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            count = self.counts.get(record.callback, 0)
+            self.counts[record.callback] = count + 1
+        return count % every == 0
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Unlike `QueueHandler`, leave the formatting of the message to the listener. The records stay in this process, so
+    they do not need to be pickled.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # The traceback would keep the frames of the request alive until the listener formats it
+            record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def worker_log_path(path: str, slot: Optional[int]) -> str:
+    """
+    :return: e.g., 'Vancouver.2.log' for 'Vancouver.log' in the worker of slot 2, or `path` outside of the workers,
+        e.g., in the master of gunicorn or in waitress
+    """
+    if slot is None:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.{slot}{extension}"
+
+
+class LogPipeline(object):
+
+    def __init__(self,
+                 logger: logging.Logger,
+                 path: str,
+                 max_bytes: int,
+                 backup_count: int,
+                 per_worker: bool,
+                 sampling: Dict[str, int]):
+        self.logger = logger
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.per_worker = per_worker
+        # The slot of the worker, once forked
+        self.slot: Optional[int] = None
+        self.queue = queue.Queue()
+        self.queue_handler = DeferredQueueHandler(self.queue)
+        self.queue_handler.addFilter(SamplingFilter(sampling))
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        # The process that started the listener; a forked worker has a copy of the listener but not its thread
+        self.listener_pid: Optional[int] = None
+
+    def create_handlers(self):
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        console_handler.setLevel(logging.INFO)
+        handlers = [console_handler]
+
+        if self.path:
+            file_handler = logging.handlers.RotatingFileHandler(
+                worker_log_path(self.path, self.slot) if self.per_worker else self.path,
+                maxBytes=self.max_bytes,
+                backupCount=self.backup_count,
+                delay=True
+            )
+            file_handler.setFormatter(formatter)
+            file_handler.setLevel(logging.INFO)
+            handlers.append(file_handler)
+        return handlers
+
+    def start(self):
+        """
+        Start the listener of this process. A forked worker does not inherit the thread of the listener, so it has to
+        call `restart`.
+        """
+        self.logger.handlers = [self.queue_handler]
+        self.listener = logging.handlers.QueueListener(self.queue, *self.create_handlers(), respect_handler_level=True)
+        self.listener.start()
+        self.listener_pid = os.getpid()
+
+    def stop(self):
+        if self.listener is None:
+            return
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        self.listener = None
+
+    def restart(self, slot: Optional[int] = None):
+        """
+        Called in a forked worker: drop the listener of the parent process and open the files of this worker. A
+        listener started by this very process is stopped first, so that its thread does not leak.
+
+        :param slot: the slot of the worker, which names its log file
+        """
+        if self.listener_pid == os.getpid():
+            self.stop()
+        self.slot = slot
+        self.listener = None
+        self.queue = queue.Queue()
+        self.queue_handler.queue = self.queue
+        self.start()
+
+
+def setup(logger: logging.Logger) -> LogPipeline:
+    pipeline = LogPipeline(
+        logger,
+        path=config.log_path,
+        max_bytes=config.log_max_bytes,
+        backup_count=config.log_backup_count,
+        per_worker=config.log_per_worker,
+        sampling=parse_sampling(config.log_sampling),
+    )
+    pipeline.start()
+    atexit.register(pipeline.stop)
+    return pipeline
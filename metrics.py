@@ -0,0 +1,313 @@
+"""
+Latency, call counts, errors and response sizes of the Dash callbacks, in the Prometheus text format.
+
+    GET /metrics
+
+Every worker of the server keeps its own counts in memory, and a background thread writes a snapshot of them every
+`flush_seconds` to `<metrics_dir>/<slot>.json`, named by the slot of the worker, see gunicorn.conf.py, or by its pid
+outside of gunicorn. `/metrics` adds up the snapshots of all the workers, so it does not matter which worker answers
+the scrape. A worker replacing another one starts from 0 in the same file, like any restarted process does for
+Prometheus, so there are never more snapshots than workers. The counts of the other workers are at most
+`flush_seconds` old. Empty the directory when the server starts. With an empty `metrics_dir`, every worker only
+reports its own counts.
+"""
+import atexit
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import flask
+from dash.exceptions import PreventUpdate
+
+import config
+
+blueprint = flask.Blueprint('metrics', __name__)
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets, the last bucket is +Inf
+latency_buckets = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+size_buckets = [256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304]
+
+
+class Histogram(object):
+    __slots__ = ['buckets', 'counts', 'total', 'count']
+
+    def __init__(self, buckets: List[float], counts: List[int] = None, total: float = 0.0, count: int = 0):
+        self.buckets = buckets
+        self.counts = counts or [0] * (len(buckets) + 1)
+        self.total = total
+        self.count = count
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def merge(self, other: 'Histogram'):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.count += other.count
+
+    def to_dict(self):
+        return {'counts': self.counts, 'total': self.total, 'count': self.count}
+
+
+class CallbackStats(object):
+    __slots__ = ['calls', 'errors', 'prevented', 'latency', 'size']
+
+    def __init__(self, calls: int = 0, errors: int = 0, prevented: int = 0, latency: dict = None, size: dict = None):
+        self.calls = calls
+        self.errors = errors
+        # Calls that raised PreventUpdate, i.e., left their output unchanged
+        self.prevented = prevented
+        self.latency = Histogram(latency_buckets, **(latency or {}))
+        self.size = Histogram(size_buckets, **(size or {}))
+
+    def merge(self, other: 'CallbackStats'):
+        self.calls += other.calls
+        self.errors += other.errors
+        self.prevented += other.prevented
+        self.latency.merge(other.latency)
+        self.size.merge(other.size)
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'prevented': self.prevented,
+            'latency': self.latency.to_dict(),
+            'size': self.size.to_dict(),
+        }
+
+
+class Registry(object):
+    """
+    The metrics of one worker.
+    """
+
+    def __init__(self, directory: str = '', flush_seconds: float = 1.0):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.callbacks: Dict[str, CallbackStats] = defaultdict(CallbackStats)
+        # (name, labels) -> value, labels being a tuple of (label, value) pairs
+        self.counters: Dict[Tuple[str, tuple], float] = defaultdict(float)
+        self.descriptions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        # The process whose thread writes the snapshots, which a forked worker does not inherit
+        self._flusher_pid = None
+        # Whether this process writes its snapshot, i.e., serves requests
+        self.flushing = True
+        # The slot of the worker, once forked, which names its snapshot
+        self.slot: Optional[int] = None
+
+    def describe(self, name: str, description: str):
+        self.descriptions[name] = description
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        with self._lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += amount
+        self.start_flusher()
+
+    def record(self, callback: str, seconds: float, size: int = None, error: bool = False, prevented: bool = False):
+        with self._lock:
+            stats = self.callbacks[callback]
+            stats.calls += 1
+            stats.latency.observe(seconds)
+            if error:
+                stats.errors += 1
+            if prevented:
+                stats.prevented += 1
+            if size is not None:
+                stats.size.observe(size)
+        self.start_flusher()
+
+    def reset(self, slot: Optional[int] = None):
+        """
+        Start the counts of this process from 0, e.g., in a forked worker, which inherits the counts of the master.
+
+        :param slot: the slot of the worker, which names its snapshot
+        """
+        with self._lock:
+            self.callbacks.clear()
+            self.counters.clear()
+            self.flushing = True
+            self.slot = slot
+
+    def stop_flushing(self):
+        """
+        Stop writing the snapshot of this process, and remove it, e.g., in the master of gunicorn, whose counts of the
+        warm up every worker inherits.
+        """
+        self.flushing = False
+        self._flusher_pid = None
+        if self.directory:
+            try:
+                os.remove(self.snapshot_path())
+            except FileNotFoundError:
+                pass
+
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, f"{self.slot if self.slot is not None else os.getpid()}.json")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'callbacks': {name: stats.to_dict() for name, stats in self.callbacks.items()},
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'descriptions': dict(self.descriptions),
+            }
+
+    def start_flusher(self):
+        """
+        Start the thread writing the snapshots of this process, so that the requests never wait for the file.
+        """
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_periodically, name='metrics-flush', daemon=True).start()
+
+    def _flush_periodically(self):
+        pid = os.getpid()
+        while True:
+            time.sleep(self.flush_seconds)
+            if self._flusher_pid != pid or not self.flushing:
+                return
+            try:
+                self.flush()
+            except OSError:
+                logger.warning("Failed to write the metrics snapshot", exc_info=True)
+
+    def flush(self):
+        if not self.directory or not self.flushing:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.snapshot_path()
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary_path, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temporary_path, path)
+
+    def collect(self) -> List[dict]:
+        """
+        :return: the snapshots of all the workers, or only of this one without a directory
+        """
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, file_name)) as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                # The worker is replacing its snapshot, it will be counted on the next scrape
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        return render(self.collect())
+
+
+def render(snapshots: List[dict]) -> str:
+    """
+    :return: the sum of the snapshots in the Prometheus text format
+    """
+    callbacks: Dict[str, CallbackStats] = defaultdict(CallbackStats)
+    counters: Dict[Tuple[str, tuple], float] = defaultdict(float)
+    descriptions = {}
+    for snapshot in snapshots:
+        for name, stats in snapshot['callbacks'].items():
+            callbacks[name].merge(CallbackStats(**stats))
+        for name, labels, value in snapshot['counters']:
+            counters[(name, tuple(tuple(label) for label in labels))] += value
+        descriptions.update(snapshot.get('descriptions', {}))
+
+    lines = []
+
+    def add_header(name: str, description: str, metric_type: str):
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    def add_histogram(name: str, histograms: Dict[str, Histogram]):
+        for callback, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ['+Inf'], histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{callback="{callback}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{callback="{callback}"}} {histogram.total}')
+            lines.append(f'{name}_count{{callback="{callback}"}} {histogram.count}')
+
+    def add_counter(name: str, values: Dict[str, int]):
+        for callback, value in sorted(values.items()):
+            lines.append(f'{name}{{callback="{callback}"}} {value}')
+
+    add_header('vancouver_callback_calls_total', 'Calls of the Dash callback.', 'counter')
+    add_counter('vancouver_callback_calls_total', {name: stats.calls for name, stats in callbacks.items()})
+    add_header('vancouver_callback_errors_total', 'Calls of the Dash callback that raised an exception.', 'counter')
+    add_counter('vancouver_callback_errors_total', {name: stats.errors for name, stats in callbacks.items()})
+    add_header('vancouver_callback_prevented_total', 'Calls of the Dash callback that raised PreventUpdate.', 'counter')
+    add_counter('vancouver_callback_prevented_total', {name: stats.prevented for name, stats in callbacks.items()})
+    add_header('vancouver_callback_latency_seconds', 'Time spent in the Dash callback.', 'histogram')
+    add_histogram('vancouver_callback_latency_seconds', {name: stats.latency for name, stats in callbacks.items()})
+    add_header('vancouver_callback_response_bytes', 'Size of the response of the Dash callback.', 'histogram')
+    add_histogram('vancouver_callback_response_bytes', {name: stats.size for name, stats in callbacks.items()})
+
+    for name in sorted({name for name, _ in counters}):
+        add_header(name, descriptions.get(name, name), 'counter')
+        for (counter_name, labels), value in sorted(counters.items()):
+            if counter_name == name:
+                label_text = ','.join(f'{label}="{label_value}"' for label, label_value in labels)
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+    return '\n'.join(lines) + '\n'
+
+
+registry = Registry(directory=config.metrics_dir, flush_seconds=config.metrics_flush_seconds)
+atexit.register(registry.flush)
+
+
+def instrument(name: str, callback):
+    """
+    :param name: the output of the callback, e.g., 'memory_state.children'
+    :param callback: the function registered in `app.callback_map`, which returns a flask.Response
+    """
+
+    def instrumented(*args, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            response = callback(*args, **kwargs)
+        except PreventUpdate:
+            registry.record(name, time.perf_counter() - started_at, prevented=True)
+            raise
+        except Exception:
+            registry.record(name, time.perf_counter() - started_at, error=True)
+            raise
+        registry.record(name, time.perf_counter() - started_at, size=response.calculate_content_length())
+        return response
+
+    instrumented.instrumented_callback = callback
+    return instrumented
+
+
+def instrument_callbacks(app):
+    """
+    Record the metrics of every callback registered so far.
+    """
+    for name, entry in app.callback_map.items():
+        if not hasattr(entry['callback'], 'instrumented_callback'):
+            entry['callback'] = instrument(name, entry['callback'])
+
+
+@blueprint.route('/metrics')
+def serve_metrics():
+    return flask.Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,119 @@
+"""
+Monte Carlo simulation of buy vs rent with random yearly appreciation, ROI and inflation rates.
+
+Each path draws its yearly rates independently from a normal distribution around the rates of the scenario. The
+paths are split into chunks which are evaluated on a process pool, and each chunk is vectorized across its paths
+with `batch.evaluate_paths`.
+"""
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from batch import evaluate_paths
+from scenario import Scenario
+
+
+class Volatility:
+    # Standard deviations of the yearly rates
+    property_appreciation = 0.05
+    other_investment_roi = 0.10
+    inflation_rate = 0.01
+
+
+class MonteCarloResult(object):
+    percentiles = [10, 50, 90]
+
+    def __init__(self, renting_capital_percentiles, property_equity_percentiles, probability_buy_wins,
+                 path_count: int):
+        """
+        :param renting_capital_percentiles: P10/P50/P90 of the equity for rent, shaped (3, number_of_years)
+        :param property_equity_percentiles: P10/P50/P90 of the equity for buy, shaped (3, number_of_years)
+        :param probability_buy_wins: the share of paths where the equity for buy is higher, by year
+        """
+        self.renting_capital_percentiles = renting_capital_percentiles
+        self.property_equity_percentiles = property_equity_percentiles
+        self.probability_buy_wins = probability_buy_wins
+        self.path_count = path_count
+
+
+_executor = None  # type: Optional[ProcessPoolExecutor]
+_executor_processes = 0
+
+
+def _get_executor(processes: int) -> ProcessPoolExecutor:
+    global _executor, _executor_processes
+    if _executor is None or _executor_processes != processes:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = ProcessPoolExecutor(max_workers=processes)
+        _executor_processes = processes
+    return _executor
+
+
+@atexit.register
+def _shutdown_executor():
+    if _executor is not None:
+        _executor.shutdown()
+
+
+def _simulate_chunk(scenario: Scenario, path_count: int, seed_sequence: np.random.SeedSequence,
+                    appreciation_volatility: float, roi_volatility: float, inflation_volatility: float):
+    random = np.random.default_rng(seed_sequence)
+    shape = (path_count, scenario.number_of_years)
+
+    result = evaluate_paths(
+        number_of_years=scenario.number_of_years,
+        annual_payment_count=scenario.mortgage_payments_per_year,
+        mortgage_loan=np.array([scenario.mortgage_loan]),
+        mortgage_interest_rate=np.array([scenario.mortgage_interest_rate]),
+        initial_rent=np.array([scenario.initial_rent]),
+        monthly_property_owning_cost=np.array([scenario.monthly_property_owning_cost]),
+        initial_capital=np.array([scenario.initial_capital]),
+        property_initial_value=np.array([scenario.property_initial_value]),
+        inflation_rates=random.normal(scenario.inflation_rate, inflation_volatility, shape),
+        appreciation_rates=random.normal(scenario.property_appreciation, appreciation_volatility, shape),
+        investment_rois=random.normal(scenario.other_investment_roi, roi_volatility, shape),
+    )
+    return result.renting_capitals, result.property_equities
+
+
+def simulate(scenario: Scenario,
+             path_count: int = 10000,
+             appreciation_volatility: float = Volatility.property_appreciation,
+             roi_volatility: float = Volatility.other_investment_roi,
+             inflation_volatility: float = Volatility.inflation_rate,
+             processes: Optional[int] = None,
+             chunk_size: int = 2500,
+             seed: Optional[int] = None) -> MonteCarloResult:
+    """
+    :param scenario: the mean rates of the simulation come from the scenario
+    :param path_count: e.g., 10,000
+    :param processes: the size of the process pool, defaults to the number of CPUs; 1 runs in this process
+    :param chunk_size: the number of paths evaluated together in one task
+    :param seed: makes the simulation reproducible, regardless of the number of processes
+    """
+    processes = processes or os.cpu_count() or 1
+    chunk_sizes = [min(chunk_size, path_count - start) for start in range(0, path_count, chunk_size)]
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    arguments = [
+        (scenario, size, seed_sequence, appreciation_volatility, roi_volatility, inflation_volatility)
+        for size, seed_sequence in zip(chunk_sizes, seed_sequences)
+    ]
+
+    if processes == 1 or len(arguments) == 1:
+        chunks = [_simulate_chunk(*args) for args in arguments]
+    else:
+        chunks = list(_get_executor(processes).map(_simulate_chunk, *zip(*arguments)))
+
+    renting_capitals = np.concatenate([capitals for capitals, _ in chunks])
+    property_equities = np.concatenate([equities for _, equities in chunks])
+
+    return MonteCarloResult(
+        renting_capital_percentiles=np.percentile(renting_capitals, MonteCarloResult.percentiles, axis=0),
+        property_equity_percentiles=np.percentile(property_equities, MonteCarloResult.percentiles, axis=0),
+        probability_buy_wins=(property_equities > renting_capitals).mean(axis=0),
+        path_count=path_count,
+    )
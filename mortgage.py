@@ -1,16 +1,197 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
 from formats import money, percentage
+from helpers import Serializable, as_series, memoized_property
+
+
+class AmortizationEngine:
+    # Closed-form annuity formula, evaluated for every payment in one numpy pass
+    vectorized = 'vectorized'
+    # Walks the schedule one payment at a time; kept as the reference implementation
+    loop = 'loop'
+
+
+def annuity_payment(loan, period_rate, payment_count):
+    """
+    The fixed payment that pays off `loan` after `payment_count` payments. Works on scalars and numpy arrays.
+
+    :param loan: e.g., 400,000
+    :param period_rate: interest rate per payment period, e.g., 0.0025 for 3% paid monthly
+    :param payment_count: total number of payments, e.g., 300
+    """
+    period_rate = np.asarray(period_rate, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payment = loan * period_rate / (1 - np.power(1 + period_rate, -payment_count))
+    return np.where(period_rate == 0, np.divide(loan, payment_count), payment)
+
+
+def remaining_balance(loan, period_rate, payment, payments_made):
+    """
+    The remaining principle after `payments_made` payments. Works on scalars and numpy arrays.
+    """
+    period_rate = np.asarray(period_rate, dtype=float)
+    growth = np.power(1 + period_rate, payments_made)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        balance = loan * growth - payment * (growth - 1) / period_rate
+    return np.where(period_rate == 0, loan - payment * np.asarray(payments_made), balance)
+
+
+def piecewise_schedule(loan, term_years: List[int], annual_interest_rates, amortization_period: int,
+                       annual_payment_count: int):
+    """
+    The schedule of a mortgage renewed at a new rate after every term, e.g., every 5 years, with the payment of every
+    term computed to pay off the balance left by the previous one by the end of the amortization period. Every term
+    is computed in closed form, and many rate paths at once.
+
+    :param loan: a scalar, or an array broadcasting against the paths
+    :param term_years: the years of every term, e.g., [5, 5, 5, 5, 5]; the last term lasts until the end of the
+        amortization period, and the terms after the amortization period are ignored
+    :param annual_interest_rates: the rate of every term, e.g., [0.03, 0.045, ...], shaped (..., terms) to evaluate
+        several rate paths
+    :return: the payments, the interest payments, the principal payments and the remaining principles, shaped
+        (..., amortization_period * annual_payment_count)
+    """
+    if not term_years or any(years <= 0 for years in term_years):
+        raise ValueError(f"Expected at least one term, every one of a positive number of years, got {term_years}")
+    annual_interest_rates = np.asarray(annual_interest_rates, dtype=float)
+    if annual_interest_rates.shape[-1:] != (len(term_years),):
+        raise ValueError(f"Expected {len(term_years)} rates per path, one for every term, "
+                         f"got the shape {annual_interest_rates.shape}")
+
+    payment_count = amortization_period * annual_payment_count
+    balance = np.asarray(loan, dtype=float)[..., np.newaxis]
+    payments, interest_payments, principal_payments, remaining_principles = [], [], [], []
+    start = 0
+    for term, years in enumerate(term_years):
+        if start >= payment_count:
+            break
+        last = term == len(term_years) - 1
+        count = payment_count - start if last else min(years * annual_payment_count, payment_count - start)
+        period_rate = annual_interest_rates[..., term:term + 1] / annual_payment_count
+
+        payment = annuity_payment(balance, period_rate, payment_count - start)
+        balances = remaining_balance(balance, period_rate, payment, np.arange(1, count + 1))
+        opening_balances = np.broadcast_to(balance, balances.shape[:-1] + (1,))
+        interests = np.concatenate((opening_balances, balances[..., :-1]), axis=-1) * period_rate
 
+        payments.append(np.broadcast_to(payment, balances.shape))
+        interest_payments.append(interests)
+        principal_payments.append(payment - interests)
+        remaining_principles.append(balances)
+        balance = balances[..., -1:]
+        start += count
 
-class Mortgage(object):
+    return tuple(np.concatenate(pieces, axis=-1)
+                 for pieces in [payments, interest_payments, principal_payments, remaining_principles])
+
+
+class AnnuityTable(object):
+    """
+    The annuity factor, i.e., the payment for a loan of 1, and the remaining balance after every payment of a loan of
+    1, for the whole percent rates and the terms offered in the settings panel. A schedule on the grid is then the
+    table scaled by the loan. The arrays are read-only, so that workers forked after `build` share them.
+    """
+
+    def __init__(self):
+        # (amortization_period, annual_payment_count) -> factors by rate, and balances shaped (rate, payment)
+        self.tables: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+        self.max_rate_in_percent = -1
+
+    def build(self, amortization_periods: Iterable[int], annual_payment_counts: Iterable[int],
+              max_rate_in_percent: int = 20):
+        """
+        :param max_rate_in_percent: the table covers the annual interest rates 0%, 1%, ..., up to this one
+        """
+        annual_payment_counts = list(annual_payment_counts)
+        rates = np.arange(max_rate_in_percent + 1)[:, np.newaxis] / 100
+        tables = {}
+        for amortization_period in amortization_periods:
+            for annual_payment_count in annual_payment_counts:
+                payment_count = amortization_period * annual_payment_count
+                factors = annuity_payment(1.0, rates / annual_payment_count, payment_count)
+                balances = remaining_balance(1.0, rates / annual_payment_count, factors,
+                                             np.arange(1, payment_count + 1))
+                factors = factors[:, 0]
+                factors.flags.writeable = False
+                balances.flags.writeable = False
+                tables[(amortization_period, annual_payment_count)] = (factors, balances)
+        self.tables = tables
+        self.max_rate_in_percent = max_rate_in_percent
+
+    def lookup(self, annual_interest_rate, amortization_period, annual_payment_count) \
+            -> Optional[Tuple[float, np.ndarray]]:
+        """
+        :return: the annuity factor and the remaining balances for a loan of 1, or None off the grid
+        """
+        table = self.tables.get((amortization_period, annual_payment_count))
+        if table is None:
+            return None
+        rate_in_percent = round(annual_interest_rate * 100)
+        # Only the very rate of the table, e.g., 3 / 100, so that scaling it gives the same schedule as computing it
+        if not 0 <= rate_in_percent <= self.max_rate_in_percent or annual_interest_rate != rate_in_percent / 100:
+            return None
+        factors, balances = table
+        return float(factors[rate_in_percent]), balances[rate_in_percent]
+
+
+# Empty until it is built at startup, see `app`
+annuity_table = AnnuityTable()
+
+
+class Mortgage(Serializable):
+    scalar_fields = ['loan', 'annual_interest_rate', 'annual_payment_count', 'amortization_period', 'payment']
+    series_fields = ['remaining_principles_by_year', 'interest_payments_by_year', 'principal_payments_by_year',
+                     'remaining_principles', 'interest_payments', 'principal_payments']
+    # The per-payment series, which are much longer than the yearly ones and not needed by any graph
+    detailed_fields = ['remaining_principles', 'interest_payments', 'principal_payments']
+    __slots__ = scalar_fields + series_fields
 
     @classmethod
-    def create(cls, loan: float, annual_interest_rate: float, amortization_period: int, annual_payment_count: int):
+    def create(cls, loan: float, annual_interest_rate: float, amortization_period: int, annual_payment_count: int,
+               engine: str = AmortizationEngine.vectorized):
         """
         :param loan: e.g., 400,000
         :param annual_interest_rate: e.g., 0.03
         :param amortization_period: e.g., 10, 15, 20, 25 and etc.
         :param annual_payment_count: e.g., 12 (monthly), 24 (by-monthly), or 26 (bi-weekly)
+        :param engine: one of `AmortizationEngine`
         """
+        if engine == AmortizationEngine.vectorized:
+            schedule = cls._vectorized_schedule
+        elif engine == AmortizationEngine.loop:
+            schedule = cls._loop_schedule
+        else:
+            raise ValueError(f"Unknown amortization engine: {engine}")
+
+        payment, interest_payments, principal_payments, remaining_principles, remaining_principles_by_year = \
+            schedule(loan, annual_interest_rate, amortization_period, annual_payment_count)
+
+        return Mortgage(loan, remaining_principles, annual_interest_rate, annual_payment_count,
+                        remaining_principles_by_year, amortization_period, interest_payments, principal_payments,
+                        payment)
+
+    @staticmethod
+    def _vectorized_schedule(loan, annual_interest_rate, amortization_period, annual_payment_count):
+        payment_count = amortization_period * annual_payment_count
+        interest_rate = annual_interest_rate / annual_payment_count
+        normalized = annuity_table.lookup(annual_interest_rate, amortization_period, annual_payment_count)
+        if normalized is not None:
+            factor, balances = normalized
+            payment = loan * factor
+            remaining_principles = loan * balances
+        else:
+            payment = float(annuity_payment(loan, interest_rate, payment_count))
+            remaining_principles = remaining_balance(loan, interest_rate, payment, np.arange(1, payment_count + 1))
+        interest_payments = np.concatenate(([loan], remaining_principles[:-1])) * interest_rate
+        principal_payments = payment - interest_payments
+        remaining_principles_by_year = remaining_principles[annual_payment_count - 1::annual_payment_count]
+
+        return payment, interest_payments, principal_payments, remaining_principles, remaining_principles_by_year
+
+    @staticmethod
+    def _loop_schedule(loan, annual_interest_rate, amortization_period, annual_payment_count):
         payment_count = amortization_period * annual_payment_count
         interest_rate = annual_interest_rate / annual_payment_count
         payment = loan * interest_rate / (1 - pow(1 + interest_rate, -payment_count))
@@ -34,21 +215,48 @@ class Mortgage(object):
         for i in range(amortization_period):
             remaining_principles_by_year.append(remaining_principles[(i + 1) * annual_payment_count - 1])
 
-        return Mortgage(loan, remaining_principles, annual_interest_rate, annual_payment_count,
-                        remaining_principles_by_year, amortization_period, interest_payments, principal_payments,
-                        payment)
+        return payment, interest_payments, principal_payments, remaining_principles, remaining_principles_by_year
 
     def __init__(self, loan, remaining_principles, annual_interest_rate, annual_payment_count,
-                 remaining_principles_by_year, amortization_period, interest_payments, principal_payments, payment):
+                 remaining_principles_by_year, amortization_period, interest_payments, principal_payments, payment,
+                 interest_payments_by_year=None, principal_payments_by_year=None, *args, **kwargs):
+        """
+        The per-payment `remaining_principles`, `interest_payments` and `principal_payments` can be None, in which
+        case the yearly aggregates must be given, and `payment_schedule` recomputes the rest on demand.
+        """
         self.loan = loan
-        self.remaining_principles = remaining_principles
+        self.remaining_principles = as_series(remaining_principles)
         self.annual_interest_rate = annual_interest_rate
         self.annual_payment_count = annual_payment_count
-        self.remaining_principles_by_year = remaining_principles_by_year
+        self.remaining_principles_by_year = as_series(remaining_principles_by_year)
         self.amortization_period = amortization_period
-        self.interest_payments = interest_payments
-        self.principal_payments = principal_payments
+        self.interest_payments = as_series(interest_payments)
+        self.principal_payments = as_series(principal_payments)
         self.payment = payment
+        if interest_payments_by_year is None:
+            interest_payments_by_year = self.group_by_year(values=self.interest_payments)
+        if principal_payments_by_year is None:
+            principal_payments_by_year = self.group_by_year(values=self.principal_payments)
+        self.interest_payments_by_year = as_series(interest_payments_by_year)
+        self.principal_payments_by_year = as_series(principal_payments_by_year)
+
+    def payment_schedule(self):
+        """
+        :return: the interest payments, principal payments and remaining principles, for every payment
+        """
+        if self.interest_payments is None:
+            _, self.interest_payments, self.principal_payments, self.remaining_principles, _ = \
+                self._vectorized_schedule(self.loan, self.annual_interest_rate, self.amortization_period,
+                                          self.annual_payment_count)
+        return self.interest_payments, self.principal_payments, self.remaining_principles
+
+    def payment_split(self, payments_made: int):
+        """
+        :return: the principal and the interest of the payment made after `payments_made` payments
+        """
+        interest_rate = self.annual_interest_rate / self.annual_payment_count
+        interest = float(remaining_balance(self.loan, interest_rate, self.payment, payments_made)) * interest_rate
+        return self.payment - interest, interest
 
     @property
     def yearly_payment(self):
@@ -58,33 +266,24 @@ class Mortgage(object):
     def total_payment(self):
         return self.yearly_payment * self.amortization_period
 
-    @property
-    def interest_payments_by_year(self):
-        return self.group_by_year(values=self.interest_payments)
-
-    @property
-    def principal_payments_by_year(self):
-        return self.group_by_year(values=self.principal_payments)
-
-    @property
+    @memoized_property
     def description(self):
+        first_principal_payment, first_interest_payment = self.payment_split(0)
+        last_principal_payment, last_interest_payment = self.payment_split(
+            self.amortization_period * self.annual_payment_count - 1)
         return f'The total loan of the mortgage is {money(self.loan)} with ' \
             f'an annual interest rate of {percentage(self.annual_interest_rate)}. ' \
             f'The mortgage term is set to {self.amortization_period} years. ' \
             f'Total mortgage payment is {money(self.total_payment)}. ' \
-            f'Monthly payment is {money(self.principal_payments[0] + self.interest_payments[0])}. ' \
-            f'For the first month, the principle payment is {money(self.principal_payments[0])}, ' \
-            f'and the interest payment is {money(self.interest_payments[0])}. ' \
-            f'For the last month, the principle payment is {money(self.principal_payments[-1])}, ' \
-            f'and interest payment is {money(self.interest_payments[-1])}. '
+            f'Monthly payment is {money(self.payment)}. ' \
+            f'For the first month, the principle payment is {money(first_principal_payment)}, ' \
+            f'and the interest payment is {money(first_interest_payment)}. ' \
+            f'For the last month, the principle payment is {money(last_principal_payment)}, ' \
+            f'and interest payment is {money(last_interest_payment)}. '
 
     @staticmethod
     def group_by_count(values, count):
-        grouped_values = [0] * int(len(values) / count)
-        for index, value in enumerate(values):
-            group_index = int(index / count)
-            grouped_values[group_index] = grouped_values[group_index] + value
-        return grouped_values
+        return np.asarray(values, dtype=float).reshape(-1, count).sum(axis=1)
 
     def group_by_year(self, values):
         return self.group_by_count(values=values, count=self.annual_payment_count)
@@ -1,9 +1,12 @@
 from formats import money, percentage
-from helpers import inflate_value
+from helpers import Serializable, as_series, inflate_value, memoized_property
 import json
 
 
-class Rent(object):
+class Rent(Serializable):
+    scalar_fields = ['inflation_rate']
+    series_fields = ['yearly_payments']
+    __slots__ = scalar_fields + series_fields
 
     @classmethod
     def create_rent(cls, initial_monthly_rent, inflation_rate, number_of_years):
@@ -12,13 +15,13 @@ class Rent(object):
 
     def __init__(self, inflation_rate, yearly_payments, *args, **kwargs):
         self.inflation_rate = inflation_rate
-        self.yearly_payments = yearly_payments
+        self.yearly_payments = as_series(yearly_payments)
 
     @property
     def total_payment(self):
         return sum(self.yearly_payments)
 
-    @property
+    @memoized_property
     def description(self):
         return f"Total rent is {money(self.total_payment)}. " \
             f"The monthly rent for the first year is {money(self.yearly_payments[0] / 12)}. " \
@@ -27,4 +30,4 @@ class Rent(object):
             f"The monthly rent for the last year is about {money(self.yearly_payments[-1] / 12)}. "
 
     def to_json(self):
-        return json.dumps(self.__dict__)
+        return json.dumps(self.to_dict())
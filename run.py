@@ -1,6 +1,59 @@
-from waitress import serve
-import app
+"""
+The production server:
+
+    python run.py
+
+serves the app with waitress or gunicorn, see `config.ServerModel`, e.g.,
+
+    VANCOUVER_SERVER=gunicorn-threaded VANCOUVER_WORKERS=4 VANCOUVER_THREADS=2 python run.py
+
+gunicorn reads gunicorn.conf.py, and then the settings of `config`. The app is imported, and so warmed up, before
+gunicorn forks its workers. `run:server` is also the WSGI app for any other server, e.g., `gunicorn run:server`.
+"""
+import os
 
+from gunicorn.app.base import Application
+
+import app
+import config
+from config import ServerModel
 
 server = app.app.server
 
+gunicorn_config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+
+
+class GunicornServer(Application):
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        self.load_config_from_file(gunicorn_config_path)
+        for name, value in self.options.items():
+            self.cfg.set(name, value)
+
+    def load(self):
+        return server
+
+
+def main():
+    bind = f"{config.server_host}:{config.server_port}"
+    app.logger.info("Serve with %s on %s, workers=%s, threads=%s",
+                    config.server_model, bind, config.server_workers, config.server_threads)
+
+    if config.server_model == ServerModel.waitress:
+        from waitress import serve
+        serve(server, host=config.server_host, port=config.server_port, threads=config.server_threads)
+    elif config.server_model == ServerModel.gunicorn_sync:
+        GunicornServer({'bind': bind, 'workers': config.server_workers, 'worker_class': 'sync'}).run()
+    elif config.server_model == ServerModel.gunicorn_threaded:
+        GunicornServer({'bind': bind, 'workers': config.server_workers, 'threads': config.server_threads,
+                        'worker_class': 'gthread'}).run()
+    else:
+        raise ValueError(f"Unknown server model: {config.server_model}")
+
+
+if __name__ == '__main__':
+    main()
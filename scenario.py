@@ -0,0 +1,93 @@
+import hashlib
+
+from helpers import Serializable
+
+
+class Scenario(Serializable):
+    """
+    The inputs of one buy vs rent comparison, as entered in the settings panel. Rates are stored as fractions,
+    e.g., 0.03 rather than 3 (%).
+    """
+    fields = [
+        'initial_rent', 'inflation_rate',
+        'property_tax', 'condo_fee', 'insurance', 'utility_cost', 'property_appreciation',
+        'mortgage_loan', 'mortgage_interest_rate', 'mortgage_terms', 'mortgage_payments_per_year',
+        'mortgage_down_payment', 'welcome_tax', 'legal_fee',
+        'other_investment_roi',
+    ]
+    scalar_fields = fields
+    __slots__ = fields
+
+    @classmethod
+    def from_inputs(cls, initial_rent, inflation_rate, property_tax, condo_fee, insurance, utility_cost,
+                    property_appreciation, mortgage_loan, mortgage_interest_rate, mortgage_terms,
+                    mortgage_payments_per_year, mortgage_down_payment, welcome_tax, legal_fee, other_investment_roi):
+        """
+        Create a scenario from the raw input values, where the rates are percentages, e.g., 3 (%).
+        """
+        return cls(
+            initial_rent=initial_rent,
+            inflation_rate=inflation_rate / 100,
+            property_tax=property_tax,
+            condo_fee=condo_fee,
+            insurance=insurance,
+            utility_cost=utility_cost,
+            property_appreciation=property_appreciation / 100,
+            mortgage_loan=mortgage_loan,
+            mortgage_interest_rate=mortgage_interest_rate / 100,
+            mortgage_terms=mortgage_terms,
+            mortgage_payments_per_year=mortgage_payments_per_year,
+            mortgage_down_payment=mortgage_down_payment,
+            welcome_tax=welcome_tax,
+            legal_fee=legal_fee,
+            other_investment_roi=other_investment_roi / 100,
+        )
+
+    def __init__(self, initial_rent, inflation_rate, property_tax, condo_fee, insurance, utility_cost,
+                 property_appreciation, mortgage_loan, mortgage_interest_rate, mortgage_terms,
+                 mortgage_payments_per_year, mortgage_down_payment, welcome_tax, legal_fee, other_investment_roi,
+                 *args, **kwargs):
+        # Rent
+        self.initial_rent = initial_rent
+        self.inflation_rate = inflation_rate
+        # Property
+        self.property_tax = property_tax
+        self.condo_fee = condo_fee
+        self.insurance = insurance
+        self.utility_cost = utility_cost
+        self.property_appreciation = property_appreciation
+        # Mortgage
+        self.mortgage_loan = mortgage_loan
+        self.mortgage_interest_rate = mortgage_interest_rate
+        self.mortgage_terms = mortgage_terms
+        self.mortgage_payments_per_year = mortgage_payments_per_year
+        # Purchase Upfront Cost
+        self.mortgage_down_payment = mortgage_down_payment
+        self.welcome_tax = welcome_tax
+        self.legal_fee = legal_fee
+        # Other investments
+        self.other_investment_roi = other_investment_roi
+
+    @property
+    def number_of_years(self):
+        return self.mortgage_terms
+
+    @property
+    def monthly_property_owning_cost(self):
+        return self.property_tax + self.condo_fee + self.insurance + self.utility_cost
+
+    @property
+    def initial_capital(self):
+        return self.mortgage_down_payment + self.welcome_tax + self.legal_fee
+
+    @property
+    def property_initial_value(self):
+        return self.mortgage_down_payment + self.mortgage_loan
+
+    @property
+    def key(self) -> str:
+        """
+        A hash of the inputs, which is the same for equal inputs regardless of how they were entered, e.g., 3 or 3.0.
+        """
+        canonical = ",".join(repr(float(getattr(self, field))) for field in self.fields)
+        return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
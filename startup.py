@@ -0,0 +1,95 @@
+"""
+The startup of a worker: how long importing the app and warming it up took, and whether it is ready.
+
+    GET /ready
+
+answers 503 until `warm` is done, and then 200, with the import and warm up times and the memory of the worker. With
+gunicorn's `preload_app`, see gunicorn.conf.py, the master imports and warms the app once before forking, and the
+workers start ready, sharing its memory copy-on-write.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import flask
+
+blueprint = flask.Blueprint('startup', __name__)
+
+# When this module was imported, i.e., when the app started to import
+import_started_at = time.perf_counter()
+
+
+class Status(object):
+
+    def __init__(self):
+        self.import_seconds: Optional[float] = None
+        # The seconds of every warm up step, by name
+        self.warm_seconds: Dict[str, float] = OrderedDict()
+        # The process which imported and warmed the app, i.e., the master when the app is preloaded
+        self.pid = os.getpid()
+        self.ready = threading.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            'ready': self.ready.is_set(),
+            'preloaded': self.pid != os.getpid(),
+            'pid': os.getpid(),
+            'import_seconds': self.import_seconds,
+            # A list rather than an object, whose keys flask.jsonify would sort
+            'warm_steps': [{'name': name, 'seconds': seconds} for name, seconds in self.warm_seconds.items()],
+            'memory': memory_bytes(),
+        }
+
+
+status = Status()
+
+
+def imported():
+    """
+    Called at the end of the import of the app.
+    """
+    status.import_seconds = time.perf_counter() - import_started_at
+
+
+def warm(steps: Dict[str, Callable[[], None]], logger=None):
+    """
+    Run the warm up steps in order, e.g., loading the locale data, and then report the worker as ready.
+    """
+    for name, step in steps.items():
+        started_at = time.perf_counter()
+        step()
+        status.warm_seconds[name] = time.perf_counter() - started_at
+        if logger is not None:
+            logger.info("Warmed up %s in %.3fs", name, status.warm_seconds[name])
+    status.ready.set()
+
+
+def memory_bytes(pid='self') -> Dict[str, int]:
+    """
+    :param pid: this process by default
+    :return: the resident memory of the process, and on Linux, its proportional share of the memory shared with the
+        other workers, and its private memory, i.e., the memory it does not share
+    """
+    fields = {'Rss': 'rss', 'Pss': 'pss', 'Private_Clean': 'private', 'Private_Dirty': 'private'}
+    memory = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as file:
+            for line in file:
+                name, _, value = line.partition(':')
+                if name in fields:
+                    memory[fields[name]] = memory.get(fields[name], 0) + int(value.split()[0]) * 1024
+    except OSError:
+        if pid != 'self':
+            raise
+        import resource
+        # The peak rather than the current resident memory, in kilobytes on Linux but in bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        memory['rss'] = max_rss if os.uname().sysname == 'Darwin' else max_rss * 1024
+    return memory
+
+
+@blueprint.route('/ready')
+def serve_ready():
+    return flask.jsonify(status.to_dict()), 200 if status.ready.is_set() else 503
@@ -0,0 +1,104 @@
+"""
+The stylesheets of the page and the compression of the responses.
+
+The stylesheets the page used to load from CDNs are vendored under assets/vendor/, and linked with a hash of their
+content, e.g., /assets/vendor/bootstrap.min.css?v=1a2b3c4d5e6f, so that browsers can keep them for a year. A stylesheet
+which is not vendored yet is still linked from its CDN. Fetch the missing ones with:
+
+    python -m static
+
+HTML, JavaScript, CSS and JSON responses larger than `config.compress_min_bytes`, including the callback responses
+and the memory_state payloads, are compressed with brotli or gzip, whichever the browser accepts.
+"""
+import hashlib
+import os
+import re
+import urllib.request
+from collections import OrderedDict
+from typing import List
+
+import flask
+from flask_compress import Compress
+
+import config
+
+vendor_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'vendor')
+vendor_url_path = '/assets/vendor/'
+
+# The file name under assets/vendor/ -> its CDN, in the order of the page
+vendored_stylesheets = OrderedDict([
+    # Bootstrap
+    ('bootstrap.min.css', 'https://maxcdn.bootstrapcdn.com/bootstrap/4.0.0/css/bootstrap.min.css'),
+    # Loading state https://community.plot.ly/t/mega-dash-loading-states/5687/3
+    ('chriddyp-bWLwgP.css', 'https://codepen.io/chriddyp/pen/bWLwgP.css'),
+    ('chriddyp-brPBPO.css', 'https://codepen.io/chriddyp/pen/brPBPO.css'),
+])
+
+# Dash links every stylesheet of assets/ after the external ones, i.e., after main.css, which must override them
+assets_ignore = '|'.join(f'^{re.escape(name)}$' for name in vendored_stylesheets)
+
+# Seconds browsers keep an asset whose URL changes with its content
+immutable_max_age = 365 * 24 * 60 * 60
+
+compressed_mimetypes = [
+    'text/html', 'text/css', 'text/xml', 'application/json', 'application/javascript',
+    # The mimetype of the scripts of the Dash components
+    'application/JavaScript',
+]
+
+
+def content_hash(path: str) -> str:
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()[:12]
+
+
+def stylesheets() -> List[str]:
+    """
+    :return: the URLs of the vendored stylesheets, or of their CDN if they are missing
+    """
+    urls = []
+    for name, cdn_url in vendored_stylesheets.items():
+        path = os.path.join(vendor_directory, name)
+        urls.append(f"{vendor_url_path}{name}?v={content_hash(path)}" if os.path.exists(path) else cdn_url)
+    return urls
+
+
+def vendor():
+    """
+    Download the vendored stylesheets which are missing.
+    """
+    os.makedirs(vendor_directory, exist_ok=True)
+    for name, cdn_url in vendored_stylesheets.items():
+        path = os.path.join(vendor_directory, name)
+        if os.path.exists(path):
+            continue
+        print(f"Downloading {cdn_url} to {path}")
+        with urllib.request.urlopen(cdn_url) as response:
+            content = response.read()
+        with open(path, 'wb') as file:
+            file.write(content)
+
+
+def add_cache_headers(response: flask.Response) -> flask.Response:
+    # Dash links the assets with their modification time, and the vendored stylesheets with their content hash
+    if flask.request.path.startswith('/assets/') and ('v' in flask.request.args or 'm' in flask.request.args) \
+            and response.status_code == 200:
+        response.headers['Cache-Control'] = f'public, max-age={immutable_max_age}, immutable'
+    return response
+
+
+def setup(server: flask.Flask):
+    """
+    Compress the responses of the server and let browsers cache the versioned assets.
+    """
+    server.config['COMPRESS_MIMETYPES'] = compressed_mimetypes
+    server.config['COMPRESS_MIN_SIZE'] = config.compress_min_bytes
+    server.config['COMPRESS_ALGORITHM'] = config.compress_algorithms
+    server.config['COMPRESS_LEVEL'] = config.compress_level
+    server.config['COMPRESS_BR_LEVEL'] = config.compress_level
+    Compress(server)
+    server.after_request(add_cache_headers)
+
+
+if __name__ == '__main__':
+    vendor()
@@ -0,0 +1,157 @@
+"""
+Property transfer tax schedules, e.g., the welcome tax in Montreal or the property transfer tax in British Columbia.
+
+A schedule keeps its brackets as cumulative tables: the lower bound of every bracket, its marginal rate, and the tax
+due on all the brackets below it. The tax of a price is then one lookup and one multiplication, with `bisect` for a
+single price and `np.searchsorted` for an array of prices.
+
+    get_schedule('bc').tax(800000, exemptions=['first_time_buyer'])
+"""
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class Exemption(object):
+    """
+    Relief of the tax on the first `exempt_value` of the price, or on the whole price without it, in full up to
+    `full_until` and then linearly less until none at `phase_out_until`.
+    """
+
+    def __init__(self,
+                 name: str,
+                 full_until: float,
+                 phase_out_until: float,
+                 exempt_value: Optional[float] = None):
+        self.name = name
+        self.full_until = full_until
+        self.phase_out_until = phase_out_until
+        self.exempt_value = exempt_value
+
+    def share(self, price: float) -> float:
+        """
+        :return: the share of the relief granted, from 1 up to `full_until` to 0 from `phase_out_until`
+        """
+        if price <= self.full_until:
+            return 1.0
+        if price >= self.phase_out_until:
+            return 0.0
+        return (self.phase_out_until - price) / (self.phase_out_until - self.full_until)
+
+    def shares(self, prices: np.ndarray) -> np.ndarray:
+        phase_out = max(self.phase_out_until - self.full_until, 1e-9)
+        return np.clip((self.phase_out_until - prices) / phase_out, 0, 1)
+
+
+class TaxSchedule(object):
+
+    def __init__(self,
+                 name: str,
+                 thresholds: List[float],
+                 rates: List[float],
+                 exemptions: Iterable[Exemption] = ()):
+        """
+        :param thresholds: the lower bound of every bracket, starting from 0, in increasing order
+        :param rates: the marginal rate of every bracket
+        """
+        assert thresholds[0] == 0 and len(thresholds) == len(rates)
+        self.name = name
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.rates = np.asarray(rates, dtype=np.float64)
+        # The tax due on all the brackets below each bracket
+        self.cumulative_taxes = np.concatenate([[0.0], np.cumsum(np.diff(self.thresholds) * self.rates[:-1])])
+        self.exemptions: Dict[str, Exemption] = {exemption.name: exemption for exemption in exemptions}
+
+        # Plain lists, much faster than numpy for a single lookup
+        self._thresholds = self.thresholds.tolist()
+        self._rates = self.rates.tolist()
+        self._cumulative_taxes = self.cumulative_taxes.tolist()
+
+    @classmethod
+    def from_brackets(cls, name: str, brackets: List[Tuple[float, float]], exemptions: Iterable[Exemption] = ()):
+        """
+        :param brackets: (lower bound of the bracket in thousands, marginal rate in percentage) of every bracket
+        """
+        return cls(
+            name=name,
+            thresholds=[from_price_k * 1000 for from_price_k, _ in brackets],
+            rates=[percentage / 100 for _, percentage in brackets],
+            exemptions=exemptions
+        )
+
+    def _base_tax(self, price: float) -> float:
+        if price <= 0:
+            return 0.0
+        index = bisect_right(self._thresholds, price) - 1
+        return self._cumulative_taxes[index] + (price - self._thresholds[index]) * self._rates[index]
+
+    def _base_taxes(self, prices: np.ndarray) -> np.ndarray:
+        prices = np.maximum(prices, 0)
+        indices = np.searchsorted(self.thresholds, prices, side='right') - 1
+        return self.cumulative_taxes[indices] + (prices - self.thresholds[indices]) * self.rates[indices]
+
+    def _get_exemptions(self, names: Iterable[str]) -> List[Exemption]:
+        unknown = [name for name in names if name not in self.exemptions]
+        if unknown:
+            raise ValueError(f"Unknown exemptions for {self.name}: {', '.join(unknown)}, "
+                             f"expected some of: {', '.join(self.exemptions)}")
+        return [self.exemptions[name] for name in names]
+
+    def tax(self, price: float, exemptions: Iterable[str] = ()) -> float:
+        result = self._base_tax(price)
+        for exemption in self._get_exemptions(exemptions):
+            share = exemption.share(price)
+            if share:
+                relief = result if exemption.exempt_value is None else \
+                    self._base_tax(min(price, exemption.exempt_value))
+                result -= relief * share
+        return result
+
+    def taxes(self, prices, exemptions: Iterable[str] = ()) -> np.ndarray:
+        """
+        :param prices: an array of prices, of any shape
+        :return: the tax of every price, in the same shape
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        result = self._base_taxes(prices)
+        for exemption in self._get_exemptions(exemptions):
+            relief = result if exemption.exempt_value is None else \
+                self._base_taxes(np.minimum(prices, exemption.exempt_value))
+            result = result - relief * exemption.shares(prices)
+        return result
+
+
+schedules: Dict[str, TaxSchedule] = {}
+
+
+def register(schedule: TaxSchedule) -> TaxSchedule:
+    schedules[schedule.name] = schedule
+    return schedule
+
+
+def get_schedule(name: str) -> TaxSchedule:
+    if name not in schedules:
+        raise ValueError(f"Unknown tax jurisdiction {name}, expected one of: {', '.join(schedules)}")
+    return schedules[name]
+
+
+# Welcome tax, i.e., duties on transfers of immovables
+register(TaxSchedule.from_brackets('montreal', [
+    (0, 0.5),
+    (50, 1.0),
+    (250, 1.5),
+    (500, 2.0),
+    (1000, 2.5),
+]))
+
+# Property transfer tax, for a residential property
+register(TaxSchedule.from_brackets('bc', [
+    (0, 1.0),
+    (200, 2.0),
+    (2000, 3.0),
+    (3000, 5.0),
+], exemptions=[
+    Exemption('first_time_buyer', full_until=835000, phase_out_until=860000, exempt_value=500000),
+    Exemption('newly_built', full_until=1100000, phase_out_until=1150000),
+]))
@@ -0,0 +1,96 @@
+import unittest
+
+import flask
+
+import api
+from appstate import AppState
+from scenario import Scenario
+
+default_inputs = dict(
+    initial_rent=1500, inflation_rate=2, property_tax=650, condo_fee=100, insurance=50, utility_cost=100,
+    property_appreciation=3, mortgage_loan=400000, mortgage_interest_rate=3, mortgage_terms=25,
+    mortgage_payments_per_year=12, mortgage_down_payment=100000, welcome_tax=8000, legal_fee=1500,
+    other_investment_roi=3
+)
+
+
+class ApiTest(unittest.TestCase):
+
+    def setUp(self):
+        server = flask.Flask(__name__)
+        server.register_blueprint(api.blueprint)
+        self.client = server.test_client()
+
+    def post(self, json_data):
+        return self.client.post('/api/v1/buy-vs-rent', json=json_data)
+
+    def test_single_scenario(self):
+        response = self.post(default_inputs)
+        self.assertEqual(response.status_code, 200)
+
+        result = response.get_json()
+        state = AppState.create(Scenario.from_inputs(**default_inputs))
+        for expected, actual in zip(state.renting_capital.capitals, result['renting_capitals']):
+            self.assertAlmostEqual(expected, actual, places=4)
+        for expected, actual in zip(state.property_value.equity_by_year, result['property_equities']):
+            self.assertAlmostEqual(expected, actual, places=4)
+        self.assertEqual(result['tipping_year'], 5)
+        self.assertEqual(result['verdict'], api.Verdict.buy)
+
+    def test_bulk_scenarios(self):
+        scenarios = [
+            dict(default_inputs, initial_rent=500, property_appreciation=-5),
+            dict(default_inputs, mortgage_payments_per_year=52),
+            dict(default_inputs, mortgage_terms=10),
+        ]
+        results = self.post({'scenarios': scenarios}).get_json()['results']
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]['verdict'], api.Verdict.rent)
+        self.assertIsNone(results[0]['tipping_year'])
+        self.assertEqual(len(results[1]['property_equities']), 25)
+        self.assertEqual(len(results[2]['property_equities']), 10)
+        self.assertEqual(results[1]['key'], Scenario.from_inputs(**scenarios[1]).key)
+
+    def test_invalid_scenario(self):
+        response = self.post(dict(default_inputs, initial_rent='a lot'))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('initial_rent', response.get_json()['error'])
+
+        inputs = dict(default_inputs)
+        del inputs['legal_fee']
+        self.assertEqual(self.post({'scenarios': [inputs]}).status_code, 400)
+
+        for invalid in [dict(mortgage_terms=25.5), dict(mortgage_terms=25.0), dict(mortgage_terms=1000),
+                        dict(mortgage_payments_per_year=12.5), dict(mortgage_payments_per_year=0),
+                        dict(initial_rent=float('nan')), dict(mortgage_loan=float('inf')), dict(legal_fee=10 ** 400),
+                        dict(mortgage_interest_rate=-100), dict(mortgage_interest_rate=-1200),
+                        dict(inflation_rate=float('-inf')), dict(mortgage_down_payment=-1)]:
+            response = self.post(dict(default_inputs, **invalid))
+            self.assertEqual(response.status_code, 400, invalid)
+            self.assertIn(next(iter(invalid)), response.get_json()['error'])
+
+    def test_amortization_schedule(self):
+        response = self.client.get('/api/v1/amortization-schedule?loan=120000&interest_rate=0&terms=10'
+                                   '&payments_per_year=12&start=2025-01-01')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(len(lines), 121)
+        self.assertEqual(lines[1], '2025-01-01,1000.00,0.00,1000.00,119000.00')
+
+        response = self.client.get('/api/v1/amortization-schedule?loan=400000&interest_rate=3&terms=25'
+                                   '&payments_per_year=12&start=2025-01-01')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(len(lines), 301)
+        self.assertEqual(lines[1], '2025-01-01,1896.85,1000.00,896.85,399103.15')
+        self.assertTrue(lines[-1].endswith(',0.00'), lines[-1])
+
+        response = self.client.get('/api/v1/amortization-schedule?loan=120000&interest_rate=3&terms=0'
+                                   '&payments_per_year=12')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('terms', response.get_json()['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import json
+import time
+import unittest
+
+import plotly
+
+import config
+
+# Keep the scenario cache, the log and the metrics of the tests in memory
+config.scenario_cache_path = ''
+config.log_path = ''
+config.metrics_dir = ''
+
+import app  # noqa: E402
+import id  # noqa: E402
+
+values = {
+    id.input_initial_rent: 1500, id.input_inflation_rate: 2, id.input_property_tax: 650, id.input_condo_fee: 100,
+    id.input_insurance: 50, id.input_utility_cost: 100, id.input_property_appreciation: 3,
+    id.input_mortgage_load: 400000, id.input_mortgage_interest_rate: 3, id.input_mortgage_terms: 25,
+    id.input_mortgage_payments_per_year: 12, id.input_mortgage_down_payment: 100000, id.input_welcome_tax: 8000,
+    id.input_legal_fee: 1500, id.other_investment_roi: 3, id.input_property_sale_price: 500000,
+}
+
+
+class AppTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.app.server.test_client()
+
+    def post_callback(self, output: str, memory_state=None, memory_key=None, **overrides):
+        """
+        Call a callback like the browser does, with `values` as the value of every input.
+        """
+        callback = app.app.callback_map[output]
+
+        def value_of(dependency):
+            if dependency['id'] == id.memory_key:
+                return memory_key
+            if dependency['property'] == 'children':
+                return memory_state
+            if dependency['property'] == 'value':
+                return overrides[dependency['id']] if dependency['id'] in overrides else values[dependency['id']]
+            return 1
+
+        output_id, output_property = output.rsplit('.', 1)
+        body = {
+            'output': {'id': output_id, 'property': output_property},
+            'inputs': [dict(dependency, value=value_of(dependency)) for dependency in callback['inputs']],
+            'state': [dict(dependency, value=value_of(dependency)) for dependency in callback['state']],
+        }
+        return self.client.post('/_dash-update-component', data=json.dumps(body), content_type='application/json')
+
+    def store_state(self, **overrides):
+        """
+        Call update_output and then store_state, like the browser does after an edit.
+
+        :return: the key of the scenario and the content of the memory_state div
+        """
+        response = self.post_callback(f"{id.memory_key}.children", **overrides)
+        memory_key = response.get_json()['response']['props']['children']
+        response = self.post_callback(f"{id.memory_state}.children", memory_key=memory_key, **overrides)
+        return memory_key, response.get_json()['response']['props']['children']
+
+    def test_skip_unchanged_scenario(self):
+        output = f"{id.memory_key}.children"
+        response = self.post_callback(output)
+        self.assertEqual(response.status_code, 200)
+        memory_key = response.get_json()['response']['props']['children']
+
+        skipped = app.metrics.registry.counters[('vancouver_update_output_skipped_total', ())]
+        response = self.post_callback(output, memory_key=memory_key)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(app.metrics.registry.counters[('vancouver_update_output_skipped_total', ())], skipped + 1)
+
+        # The same values, typed differently
+        response = self.post_callback(output, memory_key=memory_key, **{id.input_mortgage_interest_rate: 3.0})
+        self.assertEqual(response.status_code, 204)
+
+        response = self.post_callback(output, memory_key=memory_key, **{id.input_mortgage_interest_rate: 3.5})
+        self.assertEqual(response.status_code, 200)
+
+        # Only the key goes up to update_output, not the state
+        callback = app.app.callback_map[output]
+        self.assertNotIn(id.memory_state, [dependency['id'] for dependency in callback['state']])
+
+    def test_store_state(self):
+        key, memory_state = self.store_state(**{id.input_initial_rent: 1700})
+        self.assertEqual(app.load_state(memory_state, []).scenario.key, key)
+
+    def test_load_uncached_server_state(self):
+        scenario_inputs = [values[state.component_id] for state in app.scenario_states]
+        key = app.Scenario.from_inputs(**dict(zip(app.Scenario.fields, scenario_inputs))).key
+        state_storage, config.state_storage = config.state_storage, config.StateStorage.server
+        try:
+            # A key whose state was evicted, and the inputs of another scenario
+            with self.assertRaises(app.PreventUpdate):
+                app.load_state('0' * len(key), scenario_inputs)
+            self.assertIsNone(app.decoded_states.get('0' * len(key)))
+
+            self.assertEqual(app.load_state(key, scenario_inputs).scenario.key, key)
+        finally:
+            config.state_storage = state_storage
+
+    @unittest.skipIf(app.prefetch_executor is None, "The prefetch is disabled")
+    def test_prefetch_tabs(self):
+        key, memory_state = self.store_state(**{id.input_initial_rent: 1234})
+
+        output = f"{id.detailed_insights_tab_content}.children"
+        response = self.post_callback(output, memory_state=memory_state,
+                                      **{id.detailed_insights_tab: id.TabValue.tab_value_rent})
+        self.assertEqual(response.status_code, 200)
+
+        deadline = time.time() + 10
+        while any(app.rendered_tabs.get((key, tab)) is None for tab in id.TabValue.all_tabs):
+            self.assertLess(time.time(), deadline, "The other tabs were not prefetched")
+            time.sleep(0.01)
+
+        hits = app.metrics.registry.counters[('vancouver_rendered_tabs_total', (('result', 'hit'),))]
+        for tab in id.TabValue.all_tabs:
+            uncached = app.render_tab(tab, app.load_state(memory_state, []))
+            response = self.post_callback(output, memory_state=memory_state, **{id.detailed_insights_tab: tab})
+            self.assertEqual(response.get_json()['response']['props']['children'],
+                             json.loads(json.dumps(uncached, cls=plotly.utils.PlotlyJSONEncoder)))
+        self.assertEqual(app.metrics.registry.counters[('vancouver_rendered_tabs_total', (('result', 'hit'),))],
+                         hits + len(id.TabValue.all_tabs))
+
+    def test_compressed_callback(self):
+        output = f"{id.detailed_insights_tab_content}.children"
+        _, memory_state = self.store_state(**{id.input_initial_rent: 1600})
+
+        self.client.environ_base['HTTP_ACCEPT_ENCODING'] = 'gzip'
+        try:
+            response = self.post_callback(output, memory_state=memory_state,
+                                          **{id.detailed_insights_tab: id.TabValue.tab_value_rent})
+        finally:
+            del self.client.environ_base['HTTP_ACCEPT_ENCODING']
+        self.assertEqual(response.headers.get('Content-Encoding'), 'gzip')
+
+    def test_vendored_stylesheets(self):
+        for url in app.static.stylesheets():
+            if not url.startswith(app.static.vendor_url_path):
+                continue
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('immutable', response.headers['Cache-Control'])
+            response.close()
+
+    def test_ready(self):
+        response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 200)
+        status = response.get_json()
+        self.assertTrue(status['ready'])
+        self.assertEqual([step['name'] for step in status['warm_steps']],
+                         ['annuity_table', 'locale', 'default_scenario'])
+        self.assertGreater(status['memory']['rss'], 0)
+
+    def test_welcome_tax(self):
+        response = self.post_callback(f"{id.input_welcome_tax}.value")
+        self.assertEqual(response.get_json()['response']['props']['value'], 6000)
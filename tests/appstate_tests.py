@@ -0,0 +1,68 @@
+import json
+import unittest
+
+from appstate import AppState, LazyAppState, pack_series, unpack_series
+from tests.batch_tests import create_scenario
+
+
+class AppStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = AppState.create(create_scenario())
+
+    def assertSeriesEqual(self, first, second):
+        self.assertEqual(list(first), list(second))
+
+    def test_json_round_trip(self):
+        decoded = AppState.from_json(json.loads(self.state.dump()))
+
+        self.assertEqual(decoded.number_of_years, self.state.number_of_years)
+        self.assertSeriesEqual(decoded.rent.yearly_payments, self.state.rent.yearly_payments)
+        self.assertSeriesEqual(decoded.mortgage.remaining_principles, self.state.mortgage.remaining_principles)
+        self.assertSeriesEqual(decoded.renting_capital.capitals, self.state.renting_capital.capitals)
+        self.assertSeriesEqual(decoded.property_value.equity_by_year, self.state.property_value.equity_by_year)
+        self.assertEqual(decoded.scenario.key, self.state.scenario.key)
+
+    def test_lazy_state_only_decodes_used_sections(self):
+        lazy = LazyAppState(self.state.dump())
+
+        self.assertEqual(lazy.x_axis_years, self.state.x_axis_years)
+        self.assertSeriesEqual(lazy.rent.yearly_payments, self.state.rent.yearly_payments)
+        self.assertEqual(list(lazy._decoded), ["rent"])
+        self.assertIs(lazy.rent, lazy.rent)
+
+    def test_compact_round_trip(self):
+        state_json = self.state.dump_compact()
+        decoded = LazyAppState(state_json)
+
+        self.assertLess(len(state_json) * 4, len(self.state.dump()))
+        self.assertSeriesEqual(decoded.rent.yearly_payments, self.state.rent.yearly_payments)
+        self.assertSeriesEqual(decoded.mortgage.interest_payments_by_year,
+                               self.state.mortgage.interest_payments_by_year)
+        self.assertSeriesEqual(decoded.mortgage.remaining_principles_by_year,
+                               self.state.mortgage.remaining_principles_by_year)
+        self.assertEqual(decoded.renting_capital.description, self.state.renting_capital.description)
+        self.assertEqual(decoded.scenario.key, self.state.scenario.key)
+
+        self.assertIsNone(decoded.mortgage.interest_payments)
+        interest_payments, _, _ = decoded.mortgage.payment_schedule()
+        for expected, actual in zip(self.state.mortgage.interest_payments, interest_payments):
+            self.assertAlmostEqual(expected, actual)
+
+    def test_compact_round_to_cents(self):
+        state_json = self.state.dump_compact(round_to_cents=True)
+        decoded = LazyAppState(state_json)
+        for expected, actual in zip(self.state.property_value.equity_by_year, decoded.property_value.equity_by_year):
+            self.assertEqual(round(expected, 2), actual)
+        self.assertLess(len(state_json), len(self.state.dump_compact()) * 0.75)
+
+    def test_pack_cents(self):
+        for values in [[0.004, -12.346, 1234567.891], [3e9, -0.01], []]:
+            self.assertEqual(list(unpack_series(pack_series(values, round_to_cents=True))),
+                             [round(value, 2) for value in values])
+        self.assertTrue(pack_series([1.0], round_to_cents=True).startswith('cents<i4:'))
+        self.assertTrue(pack_series([3e9], round_to_cents=True).startswith('cents<i8:'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from appstate import AppState
+from batch import NEVER, evaluate_grid, evaluate_scenario
+from scenario import Scenario
+
+
+def create_scenario(**overrides):
+    inputs = dict(
+        initial_rent=1500, inflation_rate=2, property_tax=650, condo_fee=100, insurance=50, utility_cost=100,
+        property_appreciation=3, mortgage_loan=400000, mortgage_interest_rate=3, mortgage_terms=25,
+        mortgage_payments_per_year=12, mortgage_down_payment=100000, welcome_tax=8000, legal_fee=1500,
+        other_investment_roi=3
+    )
+    inputs.update(overrides)
+    return Scenario.from_inputs(**inputs)
+
+
+class BatchTest(unittest.TestCase):
+
+    def test_matches_models(self):
+        for annual_payment_count in [12, 24, 52]:
+            scenario = create_scenario(mortgage_payments_per_year=annual_payment_count)
+            state = AppState.create(scenario)
+            result = evaluate_scenario(scenario)
+
+            for expected, actual in zip(state.renting_capital.capitals, result.renting_capitals):
+                self.assertAlmostEqual(expected, actual, places=4)
+            for expected, actual in zip(state.property_value.equity_by_year, result.property_equities):
+                self.assertAlmostEqual(expected, actual, places=4)
+
+    def test_grid(self):
+        scenario = create_scenario()
+        grid = evaluate_grid(
+            scenario,
+            interest_rates=[0.02, 0.03, 0.04],
+            appreciation_rates=[-0.02, 0.03],
+            investment_rois=[0.03, 0.06, 0.09, 0.12],
+            initial_rents=[1000, 1500, 2000, 2500, 3000],
+        )
+        self.assertEqual(grid.final_equity_differences.shape, (3, 2, 4, 5))
+        self.assertEqual(grid.tipping_years.shape, (3, 2, 4, 5))
+
+        state = AppState.create(create_scenario(mortgage_interest_rate=4, property_appreciation=-2,
+                                                other_investment_roi=6, initial_rent=2000))
+        self.assertAlmostEqual(
+            grid.final_equity_differences[2, 0, 1, 2],
+            state.property_value.equity_by_year[-1] - state.renting_capital.capitals[-1],
+            places=4
+        )
+
+    def test_tipping_years(self):
+        # Expensive rent and a fast appreciating property, buying wins early
+        self.assertGreater(evaluate_scenario(create_scenario(initial_rent=4000, property_appreciation=8)).tipping_years,
+                           NEVER)
+        # Cheap rent and a depreciating property, renting always wins
+        self.assertEqual(evaluate_scenario(create_scenario(initial_rent=500, property_appreciation=-5)).tipping_years,
+                         NEVER)
+
+
+if __name__ == '__main__':
+    unittest.main()
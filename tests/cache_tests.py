@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from cache import MemoryCache, ScenarioCache
+from tests.batch_tests import create_scenario
+
+
+def put_in_cache(path, key, value):
+    ScenarioCache(path).put(key, value)
+
+
+class ScenarioCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.sqlite3')
+        self.now = 1000.0
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_cache(self, **kwargs):
+        return ScenarioCache(self.path, clock=lambda: self.now, **kwargs)
+
+    def test_get_and_put(self):
+        cache = self.create_cache()
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', 'value')
+        self.assertEqual(cache.get('a'), 'value')
+
+    def test_ttl(self):
+        cache = self.create_cache(ttl_seconds=60)
+        cache.put('a', 'value')
+        self.now += 30
+        self.assertEqual(cache.get('a'), 'value')
+        self.now += 31
+        self.assertIsNone(cache.get('a'))
+
+    def test_least_recently_used_eviction(self):
+        cache = self.create_cache(max_entries=2)
+        cache.put('a', '1')
+        self.now += 1
+        cache.put('b', '2')
+        self.now += 1
+        cache.get('a')
+        self.now += 1
+        cache.put('c', '3')
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a'), '1')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), '3')
+
+    def test_version(self):
+        self.create_cache(version='1').put('a', 'value')
+        self.assertEqual(self.create_cache(version='1').get('a'), 'value')
+        self.assertIsNone(self.create_cache(version='2').get('a'))
+        self.assertIsNone(self.create_cache().get('a'))
+
+    def test_shared_across_processes(self):
+        process = multiprocessing.Process(target=put_in_cache, args=(self.path, 'a', 'from another process'))
+        process.start()
+        process.join()
+        self.assertEqual(ScenarioCache(self.path).get('a'), 'from another process')
+
+    def test_memory_cache_eviction(self):
+        cache = MemoryCache(max_entries=2)
+        cache.put('a', '1')
+        cache.put('b', '2')
+        cache.get('a')
+        cache.put('c', '3')
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a'), '1')
+        self.assertIsNone(cache.get('b'))
+
+    def test_scenario_key_is_canonical(self):
+        self.assertEqual(create_scenario(mortgage_interest_rate=3).key,
+                         create_scenario(mortgage_interest_rate=3.0).key)
+        self.assertNotEqual(create_scenario(mortgage_interest_rate=3).key,
+                            create_scenario(mortgage_interest_rate=4).key)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+
+import components
+from components import ScenarioGraph
+from tests.batch_tests import create_scenario
+
+
+class ScenarioGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = ScenarioGraph()
+        self.graph.compute(create_scenario())
+        self.graph.hits.clear()
+        self.graph.misses.clear()
+
+    def test_roi_only_recomputes_renting_capital(self):
+        self.graph.compute(create_scenario(other_investment_roi=5))
+        self.assertEqual(set(self.graph.misses), {'renting_capital'})
+        self.assertEqual(set(self.graph.hits), {'mortgage', 'rent', 'property_value'})
+
+    def test_rent_does_not_recompute_mortgage(self):
+        self.graph.compute(create_scenario(initial_rent=2000))
+        self.assertEqual(set(self.graph.misses), {'rent', 'renting_capital'})
+
+    def test_mortgage_recomputes_downstream(self):
+        self.graph.compute(create_scenario(mortgage_interest_rate=4))
+        self.assertEqual(set(self.graph.misses), {'mortgage', 'renting_capital', 'property_value'})
+
+    def test_same_as_unmemoized(self):
+        scenario = create_scenario(other_investment_roi=5, initial_rent=2000)
+        memoized = self.graph.compute(scenario)
+        for name, expected in components.compute(scenario).items():
+            for field in expected.series_fields:
+                np.testing.assert_allclose(getattr(memoized[name], field), getattr(expected, field))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import datetime
+import io
+import itertools
+import unittest
+
+import export
+from mortgage import Mortgage
+
+
+class ExportTest(unittest.TestCase):
+    start = datetime.date(2025, 1, 31)
+
+    def test_matches_mortgage(self):
+        mortgage = Mortgage.create(loan=400000, annual_interest_rate=0.03, amortization_period=25,
+                                   annual_payment_count=12)
+        chunks = list(export.schedule_chunks(400000, 0.03, 25, 12, self.start, chunk_size=100))
+
+        self.assertEqual([len(chunk['date']) for chunk in chunks], [100, 100, 100])
+        for column, expected in [('interest', mortgage.interest_payments), ('principal', mortgage.principal_payments),
+                                 ('balance', mortgage.remaining_principles)]:
+            actual = list(itertools.chain.from_iterable(chunk[column] for chunk in chunks))
+            for expected_value, actual_value in zip(expected, actual):
+                self.assertAlmostEqual(expected_value, actual_value, places=4)
+
+    def test_payment_dates(self):
+        self.assertEqual(export.payment_date(self.start, 12, 1), datetime.date(2025, 2, 28))
+        self.assertEqual(export.payment_date(self.start, 12, 13), datetime.date(2026, 2, 28))
+        self.assertEqual(export.payment_date(datetime.date(2025, 1, 1), 24, 3), datetime.date(2025, 2, 15))
+        self.assertEqual(export.payment_date(self.start, 52, 2), datetime.date(2025, 2, 14))
+
+    def test_csv(self):
+        lines = ''.join(export.csv_chunks(export.schedule_chunks(120000, 0, 10, 12, self.start))).splitlines()
+        self.assertEqual(lines[0], 'date,payment,interest,principal,balance')
+        self.assertEqual(lines[1], '2025-01-31,1000.00,0.00,1000.00,119000.00')
+        self.assertEqual(lines[-1], '2034-12-31,1000.00,0.00,1000.00,0.00')
+        self.assertEqual(len(lines), 121)
+
+        for interest_rate, payments_per_year in [(0.03, 12), (0.03, 24), (0.03, 52), (0.05, 24), (0.07, 26)]:
+            lines = ''.join(export.csv_chunks(export.schedule_chunks(
+                400000, interest_rate, 25, payments_per_year, self.start))).splitlines()
+            self.assertTrue(lines[-1].endswith(',0.00'), lines[-1])
+            self.assertNotIn('-', ''.join(line.split(',', 1)[1] for line in lines[1:]))
+
+    def test_columnar_round_trip(self):
+        chunks = list(export.schedule_chunks(400000, 0.03, 25, 52, self.start, chunk_size=500))
+        parameters = dict(loan=400000)
+        columns, decoded_parameters = export.read_columnar(io.BytesIO(b''.join(export.columnar_chunks(
+            iter(chunks), parameters))))
+
+        self.assertEqual(decoded_parameters, parameters)
+        self.assertEqual(len(columns['balance']), 25 * 52)
+        self.assertEqual(columns['date'][0], (self.start - export.epoch).days)
+        self.assertEqual(columns['balance'][-1], chunks[-1]['balance'][-1])
+
+    def test_lazy(self):
+        chunks = export.schedule_chunks(400000, 0.03, 10000, 365, self.start, chunk_size=10)
+        self.assertEqual(len(next(chunks)['date']), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
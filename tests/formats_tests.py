@@ -0,0 +1,55 @@
+import random
+import unittest
+
+import babel.numbers
+
+import formats
+from formats import MoneyFormatter
+from mortgage import Mortgage
+
+
+class FormatsTest(unittest.TestCase):
+
+    def assertSameAsBabel(self, formatter: MoneyFormatter, values):
+        for value in values:
+            self.assertEqual(
+                formatter(value),
+                babel.numbers.format_currency(value, formatter.currency, locale=formatter.locale),
+                msg=f"value={value!r}"
+            )
+
+    def test_money(self):
+        random.seed(0)
+        values = [random.uniform(-1e7, 1e7) for _ in range(1000)] + \
+                 [k / 1000 for k in range(-3000, 3000)] + \
+                 [2.675, 0.125, -0.0, 0, 1e16, 1e22, -1e-9, float('inf'), float('nan')]
+        for locale, currency in [('en_US', 'USD'), ('fr_CA', 'CAD'), ('de_DE', 'EUR'), ('ja_JP', 'JPY')]:
+            formatter = formats.get_money_formatter(locale, currency)
+            self.assertTrue(formatter.fast)
+            self.assertSameAsBabel(formatter, values)
+
+    def test_money_fallback(self):
+        # Indian grouping, e.g., ₹12,34,567.00
+        formatter = formats.get_money_formatter('hi_IN', 'INR')
+        self.assertFalse(formatter.fast)
+        self.assertSameAsBabel(formatter, [1234567, -12.5])
+
+    def test_series(self):
+        values = [1234.5, -0.004, 1e6]
+        self.assertEqual(formats.money_series(values), [formats.money(value) for value in values])
+        self.assertEqual(formats.percentage_series([0.03, -0.015]), ['3.0%', '-1.5%'])
+        self.assertEqual(formats.thousands_series([399999.6, 387123.4, -1e-9]), ['400.0k', '387.123k', '0.0k'])
+
+    def test_duration(self):
+        self.assertEqual(formats.duration(13), '1 year and 1 month')
+        self.assertEqual(formats.duration(26), '2 years and 2 months')
+        self.assertEqual(formats.duration(12), '1 year')
+        self.assertEqual(formats.duration(1), '1 month')
+        self.assertEqual(formats.duration(0), '0 months')
+
+    def test_description_memoized(self):
+        mortgage = Mortgage.create(loan=400000, annual_interest_rate=0.03, amortization_period=25,
+                                   annual_payment_count=12)
+        description = mortgage.description
+        self.assertIn("$400,000.00", description)
+        self.assertIs(mortgage.description, description)
@@ -0,0 +1,92 @@
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+import logs
+from logs import LogPipeline, SamplingFilter
+
+
+class LogsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.logger = logging.getLogger(f"logs_tests.{self.id()}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+    def create_pipeline(self, sampling=None):
+        pipeline = LogPipeline(
+            self.logger,
+            path=os.path.join(self.directory, 'Vancouver.log'),
+            max_bytes=1024 * 1024,
+            backup_count=1,
+            per_worker=True,
+            sampling=sampling or {},
+        )
+        pipeline.create_handlers = lambda: [
+            handler for handler in LogPipeline.create_handlers(pipeline)
+            if isinstance(handler, logging.FileHandler)
+        ]
+        return pipeline
+
+    def read_log(self, slot=None):
+        with open(logs.worker_log_path(os.path.join(self.directory, 'Vancouver.log'), slot)) as file:
+            return file.read()
+
+    def test_write_through_listener(self):
+        pipeline = self.create_pipeline()
+        pipeline.start()
+        self.logger.info("Choose tab \n\ttab=%s", 'tab_value_rent')
+        pipeline.stop()
+
+        self.assertIn("Choose tab \n\ttab=tab_value_rent", self.read_log())
+
+    def test_format_lazily(self):
+        class Unformattable(object):
+            def __str__(self):
+                raise AssertionError("Formatted a filtered record")
+
+        pipeline = self.create_pipeline()
+        pipeline.start()
+        self.logger.debug("Skipped %s", Unformattable())
+        pipeline.stop()
+
+    def test_sampling(self):
+        pipeline = self.create_pipeline(sampling={'calculate_loan': 3})
+        pipeline.start()
+        for call in range(7):
+            self.logger.info("Calculate loan call=%s", call, extra={'callback': 'calculate_loan'})
+        self.logger.warning("Calculate loan failed", extra={'callback': 'calculate_loan'})
+        self.logger.info("Update output", extra={'callback': 'update_output'})
+        pipeline.stop()
+
+        text = self.read_log()
+        self.assertEqual([call for call in range(7) if f"call={call}\n" in text], [0, 3, 6])
+        self.assertIn("Calculate loan failed", text)
+        self.assertIn("Update output", text)
+
+    def test_restart(self):
+        pipeline = self.create_pipeline()
+        pipeline.start()
+        old_thread = pipeline.listener._thread
+        pipeline.restart(slot=2)
+        self.assertFalse(old_thread.is_alive())
+        self.logger.info("After restart")
+        pipeline.stop()
+
+        self.assertIn("After restart", self.read_log(slot=2))
+        self.assertEqual(sorted(os.listdir(self.directory)), ['Vancouver.2.log'])
+
+    def test_parse_sampling(self):
+        self.assertEqual(logs.parse_sampling('calculate_loan=10, choose_tab=5'),
+                         {'calculate_loan': 10, 'choose_tab': 5})
+        self.assertEqual(logs.parse_sampling(''), {})
+
+    def test_sampling_filter_keeps_records_without_callback(self):
+        sampling_filter = SamplingFilter({'calculate_loan': 100})
+        record = logging.LogRecord('name', logging.INFO, 'path', 1, 'message', None, None)
+        self.assertTrue(sampling_filter.filter(record))
+        self.assertTrue(sampling_filter.filter(record))
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import flask
+from dash.exceptions import PreventUpdate
+
+import metrics
+from metrics import Registry
+
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def create_registry(self, **kwargs):
+        registry = Registry(directory=self.directory, **kwargs)
+        # Before the directory is removed
+        self.addCleanup(registry.stop_flushing)
+        return registry
+
+    def test_render_histogram(self):
+        registry = Registry()
+        registry.record('output.children', 0.003, size=2000)
+        registry.record('output.children', 0.2, size=100)
+        registry.record('output.children', 0.02, error=True)
+
+        text = registry.render()
+        self.assertIn('vancouver_callback_calls_total{callback="output.children"} 3', text)
+        self.assertIn('vancouver_callback_errors_total{callback="output.children"} 1', text)
+        self.assertIn('vancouver_callback_latency_seconds_bucket{callback="output.children",le="0.005"} 1', text)
+        self.assertIn('vancouver_callback_latency_seconds_bucket{callback="output.children",le="0.25"} 3', text)
+        self.assertIn('vancouver_callback_latency_seconds_bucket{callback="output.children",le="+Inf"} 3', text)
+        self.assertIn('vancouver_callback_latency_seconds_count{callback="output.children"} 3', text)
+        self.assertIn('vancouver_callback_response_bytes_bucket{callback="output.children",le="256"} 1', text)
+        self.assertIn('vancouver_callback_response_bytes_count{callback="output.children"} 2', text)
+
+    def test_aggregate_workers(self):
+        first_worker = self.create_registry()
+        first_worker.record('output.children', 0.01, size=10)
+        first_worker.increment('vancouver_skipped_total', reason='duplicate')
+        first_worker.flush()
+
+        # The other worker flushes under another pid, which is simulated by moving the snapshot
+        shutil.move(f"{self.directory}/{metrics.os.getpid()}.json", f"{self.directory}/0.json")
+
+        second_worker = self.create_registry()
+        second_worker.record('output.children', 0.01, size=10)
+        second_worker.increment('vancouver_skipped_total', reason='duplicate')
+
+        text = second_worker.render()
+        self.assertIn('vancouver_callback_calls_total{callback="output.children"} 2', text)
+        self.assertIn('vancouver_skipped_total{reason="duplicate"} 2.0', text)
+
+    def test_flush_in_background(self):
+        registry = self.create_registry(flush_seconds=0.2)
+        registry.reset(slot=2)
+        registry.record('output.children', 0.01)
+        # Not on the thread of the request
+        self.assertEqual(os.listdir(self.directory), [])
+
+        path = os.path.join(self.directory, '2.json')
+        deadline = time.time() + 10
+        while not os.path.exists(path):
+            self.assertLess(time.time(), deadline, "The snapshot was not written")
+            time.sleep(0.01)
+        registry.stop_flushing()
+        self.assertFalse(os.path.exists(path))
+
+    def test_slot_replaces_snapshot(self):
+        for calls in [3, 1]:
+            # A worker replacing the one of the same slot, e.g., after a crash
+            worker = self.create_registry()
+            worker.reset(slot=1)
+            for _ in range(calls):
+                worker.record('output.children', 0.01)
+            worker.flush()
+        self.assertEqual(os.listdir(self.directory), ['1.json'])
+        self.assertIn('vancouver_callback_calls_total{callback="output.children"} 1', worker.render())
+
+    def test_reset_after_fork(self):
+        master = self.create_registry()
+        master.increment('vancouver_warm_total')
+        master.flush()
+        master.stop_flushing()
+        master.flush()
+        self.assertEqual(metrics.os.listdir(self.directory), [])
+
+        # The worker inherits the counts of the master
+        master.reset()
+        master.increment('vancouver_served_total')
+        text = master.render()
+        self.assertNotIn('vancouver_warm_total', text)
+        self.assertIn('vancouver_served_total 1.0', text)
+
+    def test_instrument(self):
+        registry = Registry()
+        original_registry = metrics.registry
+        metrics.registry = registry
+        self.addCleanup(setattr, metrics, 'registry', original_registry)
+
+        def respond():
+            return flask.Response('{"response": 1}', mimetype='application/json')
+
+        def prevent():
+            raise PreventUpdate()
+
+        metrics.instrument('respond.children', respond)()
+        with self.assertRaises(PreventUpdate):
+            metrics.instrument('prevent.children', prevent)()
+
+        self.assertEqual(registry.callbacks['respond.children'].size.total, len('{"response": 1}'))
+        self.assertEqual(registry.callbacks['prevent.children'].prevented, 1)
+        self.assertEqual(registry.callbacks['prevent.children'].errors, 0)
@@ -0,0 +1,39 @@
+import unittest
+
+from appstate import AppState
+from montecarlo import simulate
+from tests.batch_tests import create_scenario
+
+
+class MonteCarloTest(unittest.TestCase):
+
+    def test_zero_volatility_matches_models(self):
+        scenario = create_scenario()
+        state = AppState.create(scenario)
+        result = simulate(scenario, path_count=100, appreciation_volatility=0, roi_volatility=0,
+                          inflation_volatility=0, processes=1)
+
+        for percentiles in result.renting_capital_percentiles:
+            for expected, actual in zip(state.renting_capital.capitals, percentiles):
+                self.assertAlmostEqual(expected, actual, places=4)
+        for percentiles in result.property_equity_percentiles:
+            for expected, actual in zip(state.property_value.equity_by_year, percentiles):
+                self.assertAlmostEqual(expected, actual, places=4)
+
+    def test_percentile_bands(self):
+        result = simulate(create_scenario(), path_count=2000, chunk_size=500, processes=1, seed=42)
+
+        self.assertEqual(result.property_equity_percentiles.shape, (3, 25))
+        self.assertTrue((result.property_equity_percentiles[0] <= result.property_equity_percentiles[1]).all())
+        self.assertTrue((result.property_equity_percentiles[1] <= result.property_equity_percentiles[2]).all())
+        self.assertTrue(((0 <= result.probability_buy_wins) & (result.probability_buy_wins <= 1)).all())
+
+    def test_reproducible_across_processes(self):
+        kwargs = dict(path_count=1000, chunk_size=250, seed=7)
+        inline = simulate(create_scenario(), processes=1, **kwargs)
+        pooled = simulate(create_scenario(), processes=2, **kwargs)
+        self.assertEqual(inline.probability_buy_wins.tolist(), pooled.probability_buy_wins.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
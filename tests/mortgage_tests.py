@@ -1,13 +1,15 @@
 import unittest
-from mortgage import Mortgage
+from mortgage import AmortizationEngine, AnnuityTable, Mortgage, piecewise_schedule
 import json
 
+import mortgage
+
 
 class MortgageTest(unittest.TestCase):
 
     def test_total_payment(self):
         number_of_years = 25
-        mortgage = Mortgage(
+        mortgage = Mortgage.create(
             loan=400000,
             annual_interest_rate=0.03,
             amortization_period=number_of_years,
@@ -23,11 +25,110 @@ class MortgageTest(unittest.TestCase):
             amortization_period=25,
             annual_payment_count=12
         )
-        mortgage_json = json.dumps(mortgage.__dict__)
+        mortgage_json = json.dumps(mortgage.to_dict())
         mortgage_decoded = Mortgage(**json.loads(mortgage_json))
 
         self.assertAlmostEqual(mortgage_decoded.loan, mortgage.loan)
 
+    def test_vectorized_engine_matches_loop(self):
+        for annual_payment_count in [12, 24, 52]:
+            kwargs = dict(loan=400000, annual_interest_rate=0.03, amortization_period=25,
+                          annual_payment_count=annual_payment_count)
+            loop = Mortgage.create(engine=AmortizationEngine.loop, **kwargs)
+            vectorized = Mortgage.create(engine=AmortizationEngine.vectorized, **kwargs)
+
+            self.assertAlmostEqual(vectorized.payment, loop.payment)
+            self.assertEqual(len(vectorized.remaining_principles), len(loop.remaining_principles))
+            for name in ['remaining_principles', 'interest_payments', 'principal_payments',
+                         'remaining_principles_by_year']:
+                for expected, actual in zip(getattr(loop, name), getattr(vectorized, name)):
+                    self.assertAlmostEqual(expected, actual, places=4)
+
+    def test_zero_interest_rate(self):
+        mortgage = Mortgage.create(loan=120000, annual_interest_rate=0, amortization_period=10,
+                                   annual_payment_count=12)
+        self.assertAlmostEqual(mortgage.payment, 1000)
+        self.assertAlmostEqual(mortgage.remaining_principles_by_year[0], 108000)
+        self.assertAlmostEqual(mortgage.remaining_principles[-1], 0)
+
+    def test_annuity_table_matches_direct_computation(self):
+        table = AnnuityTable()
+        table.build(amortization_periods=[10, 25], annual_payment_counts=[12, 52], max_rate_in_percent=5)
+        for annual_interest_rate in [0, 0.03, 0.05]:
+            kwargs = dict(loan=400000, annual_interest_rate=annual_interest_rate, amortization_period=25,
+                          annual_payment_count=52)
+            direct = Mortgage.create(**kwargs)
+            mortgage.annuity_table, default_table = table, mortgage.annuity_table
+            try:
+                self.assertIsNotNone(table.lookup(annual_interest_rate, 25, 52))
+                tabulated = Mortgage.create(**kwargs)
+            finally:
+                mortgage.annuity_table = default_table
+
+            self.assertAlmostEqual(tabulated.payment, direct.payment)
+            for expected, actual in zip(direct.remaining_principles, tabulated.remaining_principles):
+                self.assertAlmostEqual(expected, actual, places=4)
+
+    def test_annuity_table_off_grid(self):
+        table = AnnuityTable()
+        table.build(amortization_periods=[25], annual_payment_counts=[12], max_rate_in_percent=5)
+        self.assertIsNone(table.lookup(0.035, 25, 12))
+        self.assertIsNone(table.lookup(0.06, 25, 12))
+        self.assertIsNone(table.lookup(0.03, 30, 12))
+        self.assertIsNone(table.lookup(0.03, 25, 26))
+        self.assertFalse(table.lookup(0.03, 25, 12)[1].flags.writeable)
+
+    def test_piecewise_single_rate(self):
+        mortgage = Mortgage.create(loan=400000, annual_interest_rate=0.03, amortization_period=25,
+                                   annual_payment_count=12)
+        payments, interest_payments, _, remaining_principles = piecewise_schedule(
+            400000, [5, 5, 5, 5, 5], [0.03] * 5, amortization_period=25, annual_payment_count=12)
+
+        for payment in payments:
+            self.assertAlmostEqual(payment, mortgage.payment)
+        for expected, actual in zip(mortgage.remaining_principles, remaining_principles):
+            self.assertAlmostEqual(expected, actual, places=4)
+        for expected, actual in zip(mortgage.interest_payments, interest_payments):
+            self.assertAlmostEqual(expected, actual, places=4)
+
+    def test_piecewise_renewals(self):
+        term_years, rates = [5, 10], [0.03, 0.06]
+        payments, _, principal_payments, remaining_principles = piecewise_schedule(
+            300000, term_years, rates, amortization_period=25, annual_payment_count=12)
+
+        # Simulated payment by payment, renewing after 5 years for the remaining 20 years
+        principle = 300000
+        expected_balances = []
+        for years, rate, remaining_years in [(5, 0.03, 25), (20, 0.06, 20)]:
+            payment = Mortgage.create(loan=principle, annual_interest_rate=rate, amortization_period=remaining_years,
+                                      annual_payment_count=12).payment
+            for _ in range(years * 12):
+                principle = principle * (1 + rate / 12) - payment
+                expected_balances.append(principle)
+
+        self.assertEqual(len(remaining_principles), 300)
+        self.assertGreater(payments[60], payments[59])
+        self.assertAlmostEqual(sum(principal_payments), 300000, places=4)
+        for expected, actual in zip(expected_balances, remaining_principles):
+            self.assertAlmostEqual(expected, actual, places=4)
+
+    def test_piecewise_rate_paths(self):
+        paths = [[0.02, 0.04, 0.0], [0.05, 0.03, 0.07]]
+        results = piecewise_schedule(400000, [3, 5, 2], paths, amortization_period=10, annual_payment_count=52)
+        for path, rates in enumerate(paths):
+            for batched, single in zip(results, piecewise_schedule(400000, [3, 5, 2], rates, 10, 52)):
+                self.assertEqual(batched.shape, (2, 520))
+                for expected, actual in zip(single, batched[path]):
+                    self.assertAlmostEqual(expected, actual, places=6)
+        self.assertAlmostEqual(results[3][0, -1], 0, places=4)
+
+        with self.assertRaises(ValueError):
+            piecewise_schedule(400000, [5, 5], [0.03], amortization_period=10, annual_payment_count=12)
+        with self.assertRaises(ValueError):
+            piecewise_schedule(400000, [], [], amortization_period=10, annual_payment_count=12)
+        with self.assertRaises(ValueError):
+            piecewise_schedule(400000, [0, 25], [0.03, 0.04], amortization_period=25, annual_payment_count=12)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+import tax
+from tax import TaxSchedule
+
+
+def ladder_tax(price):
+    """
+    The welcome tax, computed bracket by bracket.
+    """
+    result = 0
+    for from_price, to_price, rate in [(0, 50000, 0.005), (50000, 250000, 0.01), (250000, 500000, 0.015),
+                                       (500000, 1000000, 0.02), (1000000, float('inf'), 0.025)]:
+        if price > from_price:
+            result += (min(price, to_price) - from_price) * rate
+    return result
+
+
+class TaxTest(unittest.TestCase):
+    prices = [0, 1, 50000, 50001, 249999.99, 250000, 500000, 750000, 1000000, 2500000]
+
+    def test_montreal(self):
+        schedule = tax.get_schedule('montreal')
+        for price in self.prices:
+            self.assertAlmostEqual(schedule.tax(price), ladder_tax(price), places=6)
+        self.assertAlmostEqual(schedule.tax(500000), 6000)
+
+    def test_vectorized(self):
+        for schedule in tax.schedules.values():
+            for exemptions in [[]] + [[name] for name in schedule.exemptions]:
+                prices = np.linspace(0, 4000000, 2001)
+                expected = [schedule.tax(price, exemptions=exemptions) for price in prices]
+                np.testing.assert_allclose(schedule.taxes(prices, exemptions=exemptions), expected)
+
+    def test_vectorized_shape(self):
+        prices = np.full((3, 4), 600000.0)
+        self.assertEqual(tax.get_schedule('montreal').taxes(prices).shape, (3, 4))
+
+    def test_bc_first_time_buyer(self):
+        schedule = tax.get_schedule('bc')
+        self.assertAlmostEqual(schedule.tax(500000), 8000)
+        self.assertAlmostEqual(schedule.tax(500000, exemptions=['first_time_buyer']), 0)
+        # Only the first 500000 are exempt
+        self.assertAlmostEqual(schedule.tax(800000, exemptions=['first_time_buyer']), 14000 - 8000)
+        # Half way through the phase out
+        self.assertAlmostEqual(schedule.tax(847500, exemptions=['first_time_buyer']), 14950 - 4000)
+        self.assertAlmostEqual(schedule.tax(860000, exemptions=['first_time_buyer']), schedule.tax(860000))
+
+    def test_bc_newly_built(self):
+        schedule = tax.get_schedule('bc')
+        self.assertAlmostEqual(schedule.tax(1000000, exemptions=['newly_built']), 0)
+        self.assertAlmostEqual(schedule.tax(1125000, exemptions=['newly_built']), schedule.tax(1125000) / 2)
+        self.assertAlmostEqual(schedule.tax(3500000), 2000 + 36000 + 30000 + 25000)
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            tax.get_schedule('atlantis')
+        with self.assertRaises(ValueError):
+            tax.get_schedule('montreal').tax(500000, exemptions=['first_time_buyer'])
+
+    def test_custom_schedule(self):
+        schedule = TaxSchedule('flat', thresholds=[0], rates=[0.01])
+        self.assertAlmostEqual(schedule.tax(123456), 1234.56)
@@ -0,0 +1,38 @@
+import unittest
+
+from appstate import AppState
+from tests.batch_tests import create_scenario
+from tipping_point import find_scenario_tipping_point, tipping_month
+
+
+def first_year_better_buy(state: AppState):
+    for i, (equity, capital) in enumerate(zip(state.property_value.equity_by_year, state.renting_capital.capitals)):
+        if equity > capital:
+            return i + 1
+    return None
+
+
+class TippingPointTest(unittest.TestCase):
+
+    def test_matches_yearly_models(self):
+        for inputs in [dict(), dict(initial_rent=2500), dict(other_investment_roi=2, inflation_rate=2),
+                       dict(mortgage_interest_rate=0, other_investment_roi=0), dict(mortgage_payments_per_year=52)]:
+            scenario = create_scenario(**inputs)
+            tipping_point = find_scenario_tipping_point(scenario)
+
+            self.assertEqual(int(tipping_point) + 1, first_year_better_buy(AppState.create(scenario)))
+
+    def test_within_first_year(self):
+        scenario = create_scenario(initial_rent=4000, property_appreciation=8)
+        tipping_point = find_scenario_tipping_point(scenario)
+
+        self.assertLess(tipping_point, 1)
+        self.assertEqual(first_year_better_buy(AppState.create(scenario)), 1)
+        self.assertEqual(tipping_month(tipping_point), 7)
+
+    def test_renting_always_better(self):
+        self.assertIsNone(find_scenario_tipping_point(create_scenario(initial_rent=500, property_appreciation=-5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
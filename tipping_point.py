@@ -0,0 +1,124 @@
+"""
+Find when buying starts to beat renting, to a fraction of a year, without building any series.
+
+The equity for rent and for buy are evaluated at any time t (in years) with the closed forms of the yearly models in
+`investments`, which agree with `RentingCapital.capitals` and `PropertyValue.equity_by_year` at whole years:
+
+    rent(t) = C0 * g^t + Y * (g^t - 1) / (g - 1) + D * (g^t - h^t) / (g - h)
+    buy(t) = V0 * (1 + a)^t * (1 - commission) - remaining_principle(t)
+
+where g = 1 + ROI, h = 1 + inflation, Y is the yearly mortgage payment and D the yearly cost of owning minus the rent
+of the first year. The first whole year where buying wins brackets the crossover, which is then refined with the
+Illinois variant of regula falsi.
+"""
+import math
+from typing import Optional
+
+from scenario import Scenario
+
+# Rates closer than this are treated as equal, to avoid dividing by zero in the closed forms
+_epsilon = 1e-12
+
+
+def find_tipping_point(number_of_years: int, annual_payment_count: int, mortgage_loan: float,
+                       mortgage_interest_rate: float, initial_rent: float, inflation_rate: float,
+                       monthly_property_owning_cost: float, property_appreciation: float,
+                       other_investment_roi: float, initial_capital: float, property_initial_value: float,
+                       real_estate_commission: float = 0.05, tolerance: float = 1e-6) -> Optional[float]:
+    """
+    The parameters are the same as `batch.evaluate`, but scalars only.
+
+    :return: the time in years after which the equity for buy is higher than for rent, e.g., 6.25 for 6 years and 3
+        months, or None if renting is always better
+    """
+    investment_growth = 1 + other_investment_roi
+    inflation_growth = 1 + inflation_rate
+    appreciation_growth = 1 + property_appreciation
+
+    period_rate = mortgage_interest_rate / annual_payment_count
+    payment_count = number_of_years * annual_payment_count
+    if period_rate == 0:
+        payment = mortgage_loan / payment_count
+    else:
+        payment = mortgage_loan * period_rate / (1 - (1 + period_rate) ** -payment_count)
+    yearly_payment = payment * annual_payment_count
+    yearly_difference = 12 * (monthly_property_owning_cost - initial_rent)
+
+    def renting_capital(t: float) -> float:
+        investment_factor = investment_growth ** t
+        if abs(investment_growth - 1) < _epsilon:
+            payments_factor = t
+        else:
+            payments_factor = (investment_factor - 1) / (investment_growth - 1)
+        if abs(investment_growth - inflation_growth) < _epsilon:
+            difference_factor = t * investment_growth ** (t - 1)
+        else:
+            difference_factor = (investment_factor - inflation_growth ** t) / (investment_growth - inflation_growth)
+        return initial_capital * investment_factor + yearly_payment * payments_factor + \
+            yearly_difference * difference_factor
+
+    def property_equity(t: float) -> float:
+        payments_made = t * annual_payment_count
+        if period_rate == 0:
+            remaining_principle = mortgage_loan - payment * payments_made
+        else:
+            growth = (1 + period_rate) ** payments_made
+            remaining_principle = mortgage_loan * growth - payment * (growth - 1) / period_rate
+        value = property_initial_value * appreciation_growth ** t
+        return value * (1 - real_estate_commission) - remaining_principle
+
+    def buy_minus_rent(t: float) -> float:
+        return property_equity(t) - renting_capital(t)
+
+    # Bracket: the first whole year where buying is better
+    low, f_low = 0.0, buy_minus_rent(0.0)
+    if f_low > 0:
+        return 0.0
+    for year in range(1, number_of_years + 1):
+        high, f_high = float(year), buy_minus_rent(year)
+        if f_high > 0:
+            break
+        low, f_low = high, f_high
+    else:
+        return None
+
+    # Refine: Illinois regula falsi, keeping the root in (low, high]
+    side = 0
+    while high - low > tolerance:
+        t = (low * f_high - high * f_low) / (f_high - f_low)
+        if not low < t < high:
+            t = (low + high) / 2
+        f = buy_minus_rent(t)
+        if f > 0:
+            high, f_high = t, f
+            if side == -1:
+                f_low /= 2
+            side = -1
+        else:
+            low, f_low = t, f
+            if side == 1:
+                f_high /= 2
+            side = 1
+    return high
+
+
+def find_scenario_tipping_point(scenario: Scenario, real_estate_commission: float = 0.05) -> Optional[float]:
+    return find_tipping_point(
+        number_of_years=scenario.number_of_years,
+        annual_payment_count=scenario.mortgage_payments_per_year,
+        mortgage_loan=scenario.mortgage_loan,
+        mortgage_interest_rate=scenario.mortgage_interest_rate,
+        initial_rent=scenario.initial_rent,
+        inflation_rate=scenario.inflation_rate,
+        monthly_property_owning_cost=scenario.monthly_property_owning_cost,
+        property_appreciation=scenario.property_appreciation,
+        other_investment_roi=scenario.other_investment_roi,
+        initial_capital=scenario.initial_capital,
+        property_initial_value=scenario.property_initial_value,
+        real_estate_commission=real_estate_commission,
+    )
+
+
+def tipping_month(tipping_point: float) -> int:
+    """The month (1-based) in which the tipping point falls."""
+    return max(1, math.ceil(tipping_point * 12 - 1e-9))
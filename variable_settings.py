@@ -6,6 +6,20 @@ import dash_html_components as html
 import id
 
 
+amortization_period_options = [
+    {'label': '25 Years', 'value': 25},
+    {'label': '20 Years', 'value': 20},
+    {'label': '15 Years', 'value': 15},
+    {'label': '10 Years', 'value': 10},
+]
+
+payment_frequency_options = [
+    {'label': 'Monthly', 'value': 12},
+    {'label': 'Semimonthly', 'value': 24},
+    {'label': 'Weekly', 'value': 52},
+]
+
+
 def settings_title(text: str):
     return html.H4(className="settings_title", children=text)
 
@@ -170,12 +184,7 @@ def mortgage_settings():
         settings_label("Amortization period"),
         dcc.Dropdown(
             id=id.input_mortgage_terms,
-            options=[
-                {'label': '25 Years', 'value': 25},
-                {'label': '20 Years', 'value': 20},
-                {'label': '15 Years', 'value': 15},
-                {'label': '10 Years', 'value': 10},
-            ],
+            options=amortization_period_options,
             value=25,
             clearable=False,
         ),
@@ -185,11 +194,7 @@ def mortgage_settings():
         settings_label("Payment frequency"),
         dcc.Dropdown(
             id=id.input_mortgage_payments_per_year,
-            options=[
-                {'label': 'Monthly', 'value': 12},
-                {'label': 'Semimonthly', 'value': 24},
-                {'label': 'Weekly', 'value': 52},
-            ],
+            options=payment_frequency_options,
             value=12,
             clearable=False,
         )
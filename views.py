@@ -1,10 +1,13 @@
 import dash_core_components as dcc
 import dash_html_components as html
 
+from batch import GridResult, NEVER
+from formats import duration, money, percentage, percentage_series, thousands_series
 from investments import RentingCapital, PropertyValue
 from mortgage import Mortgage
 from rent import Rent
-from typing import List
+from tipping_point import tipping_month
+from typing import List, Optional
 import id
 
 
@@ -22,12 +25,19 @@ class Colors:
     property_evaluation_color = "#a5d6a7"
     equity_buy_color = "#2e7d32"
 
+    sensitivity_rent_color = "#c62828"
+    sensitivity_buy_color = "#2e7d32"
+
 
 def create_equity_comparison_graph(
         x_axis_years: List[int],
         renting_capital: RentingCapital,
-        property_value: PropertyValue
+        property_value: PropertyValue,
+        tipping_point: Optional[float] = None
 ):
+    """
+    :param tipping_point: from `tipping_point.find_tipping_point`, to describe it to the month
+    """
     equity_summary = f"This shows how your equity grows comparing renting vs buying in the " \
         f"next {x_axis_years[-1]} years. "
 
@@ -39,7 +49,11 @@ def create_equity_comparison_graph(
             first_year_better_buy = i
             break
 
-    if first_year_better_buy > 0:
+    if first_year_better_buy >= 0 and tipping_point is not None:
+        equity_summary += f"If you are planning on selling the property after " \
+            f"{duration(tipping_month(tipping_point))}, " \
+            f"it is better to buy. If you plan to sell before then, you'd better continue renting. "
+    elif first_year_better_buy >= 0:
         equity_summary += f"If you are planning on selling the property after {first_year_better_buy + 1} years, " \
             f"it is better to buy. If you plan to sell before then, you'd better continue renting. "
     else:
@@ -65,7 +79,7 @@ def create_equity_comparison_graph(
                 color='orange'
             ),
         )
-    ] if first_year_better_buy > 0 else None
+    ] if first_year_better_buy >= 0 else None
 
     return html.Div(children=[
         dcc.Graph(
@@ -114,6 +128,7 @@ def create_insights_tabs():
             dcc.Tab(label='Rent payments', value=id.TabValue.tab_value_rent),
             dcc.Tab(label='Equity for rent', value=id.TabValue.tab_value_equity_by_rent),
             dcc.Tab(label='Equity for buy', value=id.TabValue.tab_value_asset_for_buy),
+            dcc.Tab(label='Sensitivity', value=id.TabValue.tab_value_sensitivity),
         ]),
         html.Div(id=id.detailed_insights_tab_content)
     ])
@@ -201,7 +216,7 @@ def create_mortgage_principle_graph(x_axis_years: List[int], mortgage: Mortgage)
                         'x': x_axis_years,
                         'y': mortgage.remaining_principles_by_year,
                         'type': 'bar',
-                        'text': list(map(lambda x: f"{round(x) / 1000}k", mortgage.remaining_principles_by_year)),
+                        'text': thousands_series(mortgage.remaining_principles_by_year),
                         'hoverinfo': 'text',
                         'name': 'Remaining Mortgage',
                         'marker': {
@@ -299,7 +314,8 @@ def create_renting_investment_portfolio(x_axis_years: [int], renting_capital: Re
 def create_summary_graph(
         x_axis_years: [int],
         renting_capital: RentingCapital,
-        property_value: PropertyValue
+        property_value: PropertyValue,
+        tipping_point: Optional[float] = None
 ):
     if renting_capital.capitals[-1] < property_value.equity_by_year[-1]:
         summary = "💰 You should BUY 💰"
@@ -307,5 +323,58 @@ def create_summary_graph(
         summary = "💵 You should RENT 💵"
     return [
         html.H2(children=summary, className="golden_subtitle", style={}),
-        create_equity_comparison_graph(x_axis_years, renting_capital, property_value),
+        create_equity_comparison_graph(x_axis_years, renting_capital, property_value, tipping_point),
+    ]
+
+
+def create_sensitivity_heatmap(grid: GridResult):
+    """
+    :param grid: evaluated over interest rates and appreciation rates, with a single investment ROI and rent
+    """
+    final_equity_differences = grid.final_equity_differences[:, :, 0, 0]
+    tipping_years = grid.tipping_years[:, :, 0, 0]
+
+    appreciation_rates = percentage_series(grid.appreciation_rates)
+    hover_texts = [
+        [
+            f"Interest rate {interest_rate}, appreciation {appreciation_rate}<br>"
+            f"Buy - rent: {round(difference / 1000)}k<br>" +
+            (f"Tipping point: year {tipping_year}" if tipping_year != NEVER else "Renting is always better")
+            for appreciation_rate, difference, tipping_year in zip(appreciation_rates, differences, years)
+        ]
+        for interest_rate, differences, years in zip(
+            percentage_series(grid.interest_rates), final_equity_differences.tolist(), tipping_years.tolist())
     ]
+
+    sensitivity_description = "This shows how much more equity you would have in the final year by buying " \
+        "instead of renting, for different mortgage interest rates and property appreciation rates. " \
+        f"The investment ROI is fixed at {percentage(grid.investment_rois[0])} and the rent at " \
+        f"{money(grid.initial_rents[0])} per month. Green means buying is better, red means renting is better. "
+
+    return html.Div(children=[
+        dcc.Graph(
+            id='sensitivity-heatmap',
+            figure={
+                'data': [
+                    {
+                        'x': [rate * 100 for rate in grid.appreciation_rates],
+                        'y': [rate * 100 for rate in grid.interest_rates],
+                        'z': final_equity_differences.tolist(),
+                        'text': hover_texts,
+                        'hoverinfo': 'text',
+                        'type': 'heatmap',
+                        'colorscale': [[0, Colors.sensitivity_rent_color], [0.5, '#ffffff'],
+                                       [1, Colors.sensitivity_buy_color]],
+                        'zmid': 0,
+                        'colorbar': {'title': 'Buy - rent ($)'},
+                    },
+                ],
+                'layout': {
+                    'title': 'Final Year Equity, Buy Minus Rent',
+                    'yaxis': {'title': 'Mortgage interest rate (%)'},
+                    'xaxis': {'title': 'Property appreciation rate (%)'},
+                }
+            }
+        ),
+        html.Div(children=sensitivity_description),
+    ])